@@ -0,0 +1,264 @@
+"""Parquet archive of attendance from closed academic years.
+
+Files are laid out as <root>/year=YYYY/month=M/course=<course>/part-<run>-<n>.parquet
+and read back as a pyarrow dataset. Every scan covers one month, so only
+that month's directories are opened, and the date/id/student predicates are
+pushed down to the row-group statistics. Files are memory-mapped.
+
+The manifest records the date before which everything has been archived and
+the runs whose files are live. A run writes into a staging directory and is
+only added to the manifest once its files are in place, so files left by an
+interrupted run are never read; the next run deletes them.
+"""
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('student_pk', pa.int64()),
+    ('student_id', pa.string()),
+    ('name', pa.string()),
+    ('course', pa.string()),
+    ('date', pa.date32()),
+    ('time', pa.time64('us')),
+    ('time_in', pa.time64('us')),
+    ('time_out', pa.time64('us')),
+    ('status', pa.string()),
+])
+COLUMNS = tuple(SCHEMA.names)
+PARTITIONING = ds.partitioning(
+    pa.schema([('year', pa.int16()), ('month', pa.int8()), ('course', pa.string())]),
+    flavor='hive')
+# course is taken from the path on reading, year and month only exist there
+DATASET_SCHEMA = SCHEMA.append(pa.field('year', pa.int16())).append(pa.field('month', pa.int8()))
+MANIFEST = '_manifest.json'
+
+ArchivedStudent = namedtuple('ArchivedStudent', 'id student_id name course')
+# Shaped like an Attendance row with its student loaded, for the templates
+ArchivedRecord = namedtuple('ArchivedRecord', 'id date time time_in time_out status student')
+
+
+def months(start, end):
+    """(year, month) pairs from start's month to end's month, inclusive."""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class AttendanceArchive:
+    def __init__(self, root):
+        self.root = root
+        self.staging = root.rstrip(os.sep) + '.staging'
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+        self._dataset = None
+        self._dataset_version = None
+        os.makedirs(root, exist_ok=True)
+
+    # Manifest
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.root, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {'first_date': None, 'archived_before': None, 'runs': []}
+        for key in ('first_date', 'archived_before'):
+            if manifest[key]:
+                manifest[key] = date.fromisoformat(manifest[key])
+        return manifest
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    @property
+    def archived_before(self):
+        """Every date before this one lives in the archive (None when empty)."""
+        return self.manifest()['archived_before']
+
+    def covers(self, start):
+        """True when a range beginning at start (None: unbounded) reaches archived dates."""
+        archived_before = self.archived_before
+        return archived_before is not None and (start is None or start < archived_before)
+
+    def _files(self, runs=None):
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith('.parquet') and (runs is None or name.split('-')[1] in runs):
+                    yield os.path.join(directory, name)
+
+    def dataset(self):
+        """The live files as one dataset, rebuilt only when the manifest changes."""
+        path = os.path.join(self.root, MANIFEST)
+        version = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+        if self._dataset is None or version != self._dataset_version:
+            runs = set(self.manifest()['runs'])
+            self._dataset = ds.dataset(
+                sorted(self._files(runs)), schema=DATASET_SCHEMA, format='parquet',
+                partitioning=PARTITIONING, partition_base_dir=self.root,
+                filesystem=self.filesystem)
+            self._dataset_version = version
+        return self._dataset
+
+    # Writing
+
+    def write(self, batches, before):
+        """Archive rows (tuples in COLUMNS order, sorted by date) for dates before `before`.
+
+        Returns the number of rows written. The caller deletes them from the
+        database only afterwards.
+        """
+        manifest = self.manifest()
+        if manifest['archived_before'] and before <= manifest['archived_before']:
+            raise ValueError(f"Already archived up to {manifest['archived_before']}")
+
+        # Leftovers of an interrupted run
+        for path in set(self._files()) - set(self._files(set(manifest['runs']))):
+            os.remove(path)
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+        run = time.strftime('%Y%m%d%H%M%S')
+        written = 0
+        first_date = None
+        month = None
+        pending = []
+
+        def flush():
+            # write_dataset reads its input on pyarrow's own threads, so each
+            # month is collected here and handed over as one table
+            table = pa.Table.from_pylist([dict(zip(COLUMNS, row)) for row in pending],
+                                         schema=SCHEMA)
+            table = (table
+                     .append_column('year', pa.array([month[0]] * table.num_rows, pa.int16()))
+                     .append_column('month', pa.array([month[1]] * table.num_rows, pa.int8())))
+            ds.write_dataset(table, self.staging, format='parquet', partitioning=PARTITIONING,
+                             basename_template=f'part-{run}-{month[0]}{month[1]:02d}-{{i}}.parquet',
+                             existing_data_behavior='overwrite_or_ignore')
+            pending.clear()
+
+        for rows in batches:
+            for row in rows:
+                day = row[COLUMNS.index('date')]
+                if (day.year, day.month) != month:
+                    if pending:
+                        flush()
+                    month = (day.year, day.month)
+                first_date = first_date or day
+                pending.append(row)
+                written += 1
+        if pending:
+            flush()
+
+        for directory, _, names in os.walk(self.staging):
+            target = os.path.join(self.root, os.path.relpath(directory, self.staging))
+            os.makedirs(target, exist_ok=True)
+            for name in names:
+                os.replace(os.path.join(directory, name), os.path.join(target, name))
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+        self._write_manifest({
+            'first_date': manifest['first_date'] or first_date,
+            'archived_before': before,
+            'runs': manifest['runs'] + [run],
+        })
+        return written
+
+    # Reading
+
+    def _bounds(self, start, end):
+        manifest = self.manifest()
+        if not manifest['archived_before'] or not manifest['first_date']:
+            return None
+        start = max(start or manifest['first_date'], manifest['first_date'])
+        end = min(end or date.max, manifest['archived_before'] - timedelta(days=1))
+        return (start, end) if start <= end else None
+
+    def _scan(self, year, month, condition, columns):
+        predicate = (ds.field('year') == year) & (ds.field('month') == month)
+        if condition is not None:
+            predicate = predicate & condition
+        return self.dataset().to_table(columns=list(columns), filter=predicate)
+
+    def _condition(self, start, end, students):
+        condition = (ds.field('date') >= start) & (ds.field('date') <= end)
+        if students is not None:
+            condition = condition & ds.field('student_pk').isin(list(students))
+        return condition
+
+    def records_page(self, start, end, student_code=None, after=None, before=None, limit=50,
+                     students=None):
+        """Up to limit ArchivedRecords in [start, end], keyset-ordered on (date, id).
+
+        Newest first and older than `after` by default; oldest first and newer
+        than `before` when that cursor is given, like keyset_page. students,
+        when given, limits the records to those student primary keys.
+        """
+        bounds = self._bounds(start, end)
+        if bounds is None:
+            return []
+        start, end = bounds
+        condition = self._condition(start, end, students)
+        if student_code:
+            condition = condition & (ds.field('student_id') == student_code)
+        cursor = before or after
+        if cursor:
+            day, row_id = cursor
+            if before:
+                condition = condition & ((ds.field('date') > day) |
+                                         ((ds.field('date') == day) & (ds.field('id') > row_id)))
+            else:
+                condition = condition & ((ds.field('date') < day) |
+                                         ((ds.field('date') == day) & (ds.field('id') < row_id)))
+        order = 'ascending' if before else 'descending'
+        span = list(months(start, end))
+        if not before:
+            span.reverse()
+
+        records = []
+        for year, month in span:
+            # Pick the keys from two narrow columns, then read only those rows
+            keys = (self._scan(year, month, condition, ('date', 'id'))
+                    .sort_by([('date', order), ('id', order)])
+                    .slice(0, limit - len(records)))
+            if keys.num_rows:
+                rows = (self._scan(year, month, condition & ds.field('id').isin(keys['id']),
+                                   COLUMNS)
+                        .sort_by([('date', order), ('id', order)]))
+                records.extend(
+                    ArchivedRecord(row['id'], row['date'], row['time'], row['time_in'],
+                                   row['time_out'], row['status'],
+                                   ArchivedStudent(row['student_pk'], row['student_id'],
+                                                   row['name'], row['course']))
+                    for row in rows.to_pylist())
+            if len(records) >= limit:
+                break
+        return records
+
+    def rows(self, start, end, columns, batch_size=5000, students=None):
+        """Tuples of the named columns for [start, end], ordered by (date, id).
+
+        students, when given, limits the rows to those student primary keys.
+        """
+        bounds = self._bounds(start, end)
+        if bounds is None:
+            return
+        start, end = bounds
+        condition = self._condition(start, end, students)
+        for year, month in months(start, end):
+            table = (self._scan(year, month, condition, set(columns) | {'date', 'id'})
+                     .sort_by([('date', 'ascending'), ('id', 'ascending')]))
+            for batch in table.select(list(columns)).to_batches(batch_size):
+                yield from zip(*(column.to_pylist() for column in batch.columns))
@@ -0,0 +1,24 @@
+"""Benchmark suite for the attendance app.
+
+    python -m benchmarks seed --students 100000 --days 365
+    python -m benchmarks run --iterations 200 --output results.json
+    python -m benchmarks run --url http://localhost:8000 --concurrency 32
+    python -m benchmarks compare before.json after.json
+    python benchmarks/roster.py --students 100000
+    python benchmarks/startup.py --runs 10
+
+The database comes from DATABASE_URL, as for the app itself; without it a
+SQLite file in the temp directory is used so the suite runs anywhere.
+peak_rss_mb is each scenario's own peak where /proc allows resetting it,
+and the request_peak_kb figures trace a few extra requests one at a time.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault(
+    'DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'attendance-bench.db')}")
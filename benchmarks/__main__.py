@@ -0,0 +1,155 @@
+"""Command line entry point: seed, run and compare."""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import date, datetime
+
+from . import ROOT
+from .runner import run, session_factory
+from .seed import COURSES, seed
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+            stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_app():
+    """The app module and an app built by its factory."""
+    import app as attendance_app
+    # The access log would otherwise print a line for every benchmarked request
+    app = attendance_app.create_app({'LOG_LEVEL': 'WARNING'})
+    return attendance_app, app
+
+
+def benchmark_context(attendance_app, app, sessions):
+    """Dataset size, a day that has data, and confirmed student logins to use."""
+    Student, Attendance, db = attendance_app.Student, attendance_app.Attendance, attendance_app.db
+    with app.app_context():
+        emails = [email for (email,) in db.session.query(Student.email)
+                  .filter(Student.email.like('bench%'), Student.confirmed.is_(True))
+                  .order_by(Student.id).limit(sessions)]
+        return {
+            'day': db.session.query(db.func.max(Attendance.date)).scalar() or date.today(),
+            'emails': emails,
+            'periods': attendance_app.PERIODS,
+            'admin_username': app.config['ADMIN_USERNAME'],
+            'admin_password': app.config['ADMIN_PASSWORD'],
+            'dataset': {'students': db.session.query(Student.id).count(),
+                        'attendance': db.session.query(Attendance.id).count()},
+            'database': db.engine.dialect.name,
+        }
+
+
+def command_seed(args):
+    attendance_app, app = load_app()
+    counts = seed(attendance_app, app, students=args.students, days=args.days,
+                  present_rate=args.present_rate, late_rate=args.late_rate,
+                  courses=args.courses, batch_size=args.batch_size, reset=args.reset)
+    print(json.dumps(counts))
+
+
+def command_run(args):
+    attendance_app, app = load_app()
+    context = benchmark_context(attendance_app, app, max(args.concurrency, args.iterations))
+    if not context['emails']:
+        sys.exit("No benchmark students found; run `python -m benchmarks seed` first")
+    factory = session_factory(app=app, url=args.url)
+    # Requests can only be traced in this process, not in a server behind --url
+    memory_iterations = 0 if args.url else args.memory_iterations
+    scenarios = run(factory, context, args.iterations, args.concurrency,
+                    heavy_iterations=args.export_iterations, only=set(args.scenario or ()),
+                    server_pid=args.server_pid, memory_iterations=memory_iterations)
+    report = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'mode': 'http' if args.url else 'test-client',
+        'concurrency': args.concurrency,
+        'iterations': args.iterations,
+        'export_iterations': args.export_iterations,
+        'memory_iterations': memory_iterations,
+        'database': context['database'],
+        'dataset': context['dataset'],
+        'scenarios': scenarios,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return ''
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def command_compare(args):
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    metrics = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb', 'request_peak_kb_max')
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'scenario':<28}" + ''.join(f"{metric:>24}" for metric in metrics))
+    for name, result in after['scenarios'].items():
+        old = before['scenarios'].get(name, {})
+        cells = [f"{result.get(metric)} ({change(old.get(metric), result.get(metric))})"
+                 if old else str(result.get(metric)) for metric in metrics]
+        print(f"{name:<28}" + ''.join(f"{cell:>24}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='insert synthetic students and attendance')
+    seed_parser.add_argument('--students', type=int, default=1000)
+    seed_parser.add_argument('--days', type=int, default=30, help='school days of attendance')
+    seed_parser.add_argument('--courses', type=int, default=len(COURSES))
+    seed_parser.add_argument('--present-rate', type=float, default=0.9)
+    seed_parser.add_argument('--late-rate', type=float, default=0.1)
+    seed_parser.add_argument('--batch-size', type=int, default=5000)
+    seed_parser.add_argument('--reset', action='store_true',
+                             help='delete all students and attendance first')
+    seed_parser.set_defaults(handler=command_seed)
+
+    run_parser = commands.add_parser('run', help='benchmark the endpoints and print JSON')
+    run_parser.add_argument('--iterations', type=int, default=100,
+                            help='requests per scenario')
+    run_parser.add_argument('--export-iterations', type=int, default=10,
+                            help='requests per whole-period export scenario')
+    run_parser.add_argument('--concurrency', type=int, default=1)
+    run_parser.add_argument('--url', help='load a running server over HTTP instead of '
+                                          'the test client; it must use the same database')
+    run_parser.add_argument('--memory-iterations', type=int, default=5,
+                            help='requests per scenario traced with tracemalloc for their '
+                                 'own peak memory, after the timed ones (test client only)')
+    run_parser.add_argument('--server-pid', type=int,
+                            help='report the peak RSS of this process (HTTP mode)')
+    run_parser.add_argument('--scenario', action='append',
+                            help='only run this scenario (repeatable)')
+    run_parser.add_argument('--output', help='also write the JSON report here')
+    run_parser.set_defaults(handler=command_run)
+
+    compare_parser = commands.add_parser('compare', help='diff two JSON reports')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.set_defaults(handler=command_compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
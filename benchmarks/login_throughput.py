@@ -0,0 +1,84 @@
+"""Student logins per second per core, hashing inline vs. in the process pool.
+
+    python benchmarks/login_throughput.py --logins 200 --threads 8 --workers 4
+
+Uses a throwaway SQLite database, so it can run anywhere the app imports.
+bcrypt releases the GIL, so inline hashing on several threads uses several
+cores too: both runs are divided by the machine's cores, and by the CPU
+seconds they actually used (this process and the pool's workers).
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import app as attendance_app
+
+
+def cpu_seconds():
+    """CPU time of this process and of its exited children, e.g. a shut down pool."""
+    return sum(usage.ru_utime + usage.ru_stime for usage in (
+        resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)))
+
+
+def run(logins, threads, workers, rounds):
+    app = attendance_app.create_app({'BCRYPT_LOG_ROUNDS': rounds, 'PASSWORD_HASH_WORKERS': workers,
+                                     'LOG_LEVEL': 'WARNING', 'WARM_UP': False})
+    # Every login succeeds, so the throttle never kicks in
+    with app.app_context():
+        attendance_app.db.create_all()
+        if not attendance_app.Student.query.filter_by(email='bench@example.com').first():
+            attendance_app.db.session.add(attendance_app.Student(
+                student_id='BENCH', name='Bench', course='Bench', email='bench@example.com',
+                password=attendance_app.password_hasher.hash('secret'), gender='N/A', confirmed=True))
+            attendance_app.db.session.commit()
+
+    def login(_):
+        client = app.test_client()
+        response = client.post('/login', data={
+            'role': 'student', 'username': 'bench@example.com', 'password': 'secret'})
+        assert response.status_code == 302, response.status_code
+
+    started, cpu_started = time.perf_counter(), cpu_seconds()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    # Joining the pool's processes is what adds their CPU time to RUSAGE_CHILDREN
+    app.extensions['attendance']['password_hasher'].shutdown()
+    cpu = cpu_seconds() - cpu_started
+    cores = os.cpu_count() or 1
+    return {
+        'workers': workers,
+        'threads': threads,
+        'rounds': rounds,
+        'logins': logins,
+        'logins_per_second': round(logins / elapsed, 2),
+        'cores': cores,
+        'logins_per_second_per_core': round(logins / elapsed / cores, 2),
+        'cpu_seconds': round(cpu, 2),
+        'logins_per_cpu_second': round(logins / cpu, 2) if cpu else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--rounds', type=int, default=12)
+    args = parser.parse_args()
+
+    results = [run(args.logins, args.threads, 0, args.rounds),
+               run(args.logins, args.threads, args.workers, args.rounds)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Query latency on partitioned vs. unpartitioned attendance (PostgreSQL).
+
+    python -m benchmarks.partitioning --students 20000 --years 3 --repeat 50
+
+Builds both layouts side by side in a scratch schema of the DATABASE_URL
+database, fills them with the same generated rows, and times the app's
+period queries against each. The scratch schema is dropped afterwards
+unless --keep is given.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, text
+
+from partitions import add_months, create_partitions
+from .runner import percentile
+
+SCHEMA = 'bench_partitioning'
+COLUMNS = (
+    "id SERIAL NOT NULL, date DATE NOT NULL, time TIME, time_in TIME, time_out TIME,"
+    " status VARCHAR(20) NOT NULL, student_id INTEGER NOT NULL"
+)
+LAYOUTS = {
+    'unpartitioned': (
+        f"CREATE TABLE attendance_flat ({COLUMNS}, PRIMARY KEY (id),"
+        " UNIQUE (student_id, date))",
+        "CREATE INDEX ON attendance_flat (date, id)",
+    ),
+    'partitioned': (
+        f"CREATE TABLE attendance ({COLUMNS}, PRIMARY KEY (id, date),"
+        " UNIQUE (student_id, date)) PARTITION BY RANGE (date)",
+        "CREATE INDEX ON attendance (date, id)",
+    ),
+}
+TABLES = {'unpartitioned': 'attendance_flat', 'partitioned': 'attendance'}
+
+# The shapes of the app's hot statements; :start/:end come from a period
+QUERIES = {
+    'records_page': "SELECT * FROM {table} WHERE date BETWEEN :start AND :end"
+                    " ORDER BY date DESC, id DESC LIMIT 51",
+    'period_export': "SELECT date, student_id, time_in, time_out, status FROM {table}"
+                     " WHERE date BETWEEN :start AND :end ORDER BY date, id",
+    'period_counts': "SELECT status, COUNT(*) FROM {table}"
+                     " WHERE date BETWEEN :start AND :end GROUP BY status",
+    'student_history': "SELECT * FROM {table} WHERE student_id = :student ORDER BY date DESC",
+    'delete_student': "DELETE FROM {table} WHERE student_id = :student",
+}
+PERIOD_DAYS = {'daily': 1, 'weekly': 7, 'monthly': 31, 'yearly': 366}
+
+
+def build(connection, students, first, last):
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    # Session-wide, so the later transactions on this connection see it too
+    connection.execute(text(f"SET search_path TO {SCHEMA}"))
+    for statements in LAYOUTS.values():
+        for statement in statements:
+            connection.execute(text(statement))
+    create_partitions(connection, first, last)
+
+    connection.execute(text(
+        "INSERT INTO attendance_flat (student_id, date, time, time_in, time_out, status)"
+        " SELECT s, d::date, time '07:30' + random() * interval '60 minutes',"
+        "  time '07:30' + random() * interval '60 minutes',"
+        "  time '15:00' + random() * interval '120 minutes',"
+        "  CASE WHEN random() < 0.1 THEN 'Late' ELSE 'Present' END"
+        " FROM generate_series(1, :students) s,"
+        "  generate_series(CAST(:first AS date), CAST(:last AS date), interval '1 day') d"
+        " WHERE extract(isodow FROM d) < 6 AND random() < 0.9"),
+        {'students': students, 'first': first, 'last': last})
+    connection.execute(text(
+        "INSERT INTO attendance SELECT * FROM attendance_flat"))
+    connection.execute(text("ANALYZE attendance_flat"))
+    connection.execute(text("ANALYZE attendance"))
+    return connection.execute(text("SELECT COUNT(*) FROM attendance_flat")).scalar()
+
+
+def time_query(connection, sql, params):
+    # Rolled back to a savepoint so that the DELETE leaves the data alone
+    with connection.begin_nested() as savepoint:
+        started = time.perf_counter()
+        result = connection.execute(text(sql), params)
+        if result.returns_rows:
+            result.fetchall()
+        elapsed = time.perf_counter() - started
+        savepoint.rollback()
+    return elapsed
+
+
+def run(connection, students, first, last, repeat, rng):
+    results = {}
+    for layout, table in TABLES.items():
+        for name, template in QUERIES.items():
+            periods = PERIOD_DAYS if ':start' in template else {'': None}
+            for period, days in periods.items():
+                latencies = []
+                for _ in range(repeat):
+                    end = first + timedelta(days=rng.randrange((last - first).days))
+                    params = {'student': rng.randint(1, students),
+                              'start': end - timedelta(days=(days or 1) - 1), 'end': end}
+                    latencies.append(time_query(connection, template.format(table=table), params))
+                latencies.sort()
+                key = f"{name}_{period}" if period else name
+                results.setdefault(key, {})[layout] = {
+                    'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                    'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+                    'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch schema')
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    url = os.environ['DATABASE_URL']
+    if not url.startswith('postgresql'):
+        raise SystemExit("Partitioning needs PostgreSQL; set DATABASE_URL")
+    last = date.today()
+    first = add_months(last.replace(day=1), -12 * args.years)
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        with connection.begin():
+            rows = build(connection, args.students, first, last)
+        with connection.begin():
+            results = run(connection, args.students, first, last, args.repeat, random.Random(0))
+        if not args.keep:
+            with connection.begin():
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+    report = {'students': args.students, 'years': args.years, 'rows': rows,
+              'repeat': args.repeat, 'queries': results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""The daily roster (admin_attendance) at 100k students: time and memory per request.
+
+    python benchmarks/roster.py --students 100000 --iterations 20
+
+Seeds a throwaway SQLite database (or the DATABASE_URL one, which should be
+empty) with the students and one school day of attendance, then times the
+roster page and traces the Python memory each request peaks at.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{tempfile.mkdtemp()}/roster.db")
+
+from benchmarks.__main__ import benchmark_context, load_app
+from benchmarks.runner import run, session_factory
+from benchmarks.seed import seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--memory-iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    attendance_app, app = load_app()
+    dataset = seed(attendance_app, app, students=args.students, days=1)
+    context = benchmark_context(attendance_app, app, 1)
+    scenarios = run(session_factory(app=app), context, args.iterations, 1,
+                    only={'admin_attendance'}, memory_iterations=args.memory_iterations)
+    print(json.dumps({'dataset': dataset, 'scenarios': scenarios}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
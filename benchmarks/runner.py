@@ -0,0 +1,219 @@
+"""Endpoint scenarios driven through the Flask test client or over HTTP."""
+import http.cookiejar
+import resource
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .seed import PASSWORD
+
+# heavy scenarios (whole-period exports) run fewer iterations
+Scenario = namedtuple('Scenario', 'name role request heavy', defaults=(False,))
+
+
+def scenarios(context):
+    """The benchmarked requests; request(session, i) returns (status, body bytes)."""
+    day = context['day'].isoformat()
+    emails = context['emails']
+    students = max(len(emails), 1)
+
+    yield Scenario('login', None, lambda s, i: s.post('/login', {
+        'role': 'student', 'username': emails[i % students], 'password': PASSWORD}))
+    yield Scenario('mark_attendance', 'student', lambda s, i: s.get('/mark_attendance'))
+    # A different term every time, so the listing cache is not what gets measured
+    yield Scenario('admin_students_search', 'admin', lambda s, i: s.get(
+        '/admin/students?' + urllib.parse.urlencode({'q': f"Student {i * 7919 % students}"})))
+    yield Scenario('admin_students_suggest', 'admin', lambda s, i: s.get(
+        '/admin/students/suggest?' + urllib.parse.urlencode({'q': f"stud {i * 7919 % students}"})))
+    for period in context['periods']:
+        yield Scenario(f'admin_records_{period}', 'admin', lambda s, i, period=period: s.get(
+            f'/admin/records?period={period}&date={day}'))
+    yield Scenario('admin_attendance', 'admin', lambda s, i: s.get(f'/admin/attendance?date={day}'))
+    for fmt in ('csv', 'xlsx'):
+        yield Scenario(f'export_records_{fmt}', 'admin', lambda s, i, fmt=fmt: s.get(
+            f'/export/records/monthly?format={fmt}'), heavy=True)
+
+
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def _read(self, response):
+        # Counted chunk by chunk, so a streamed body is never held whole here
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+        return response.status_code, size
+
+    def get(self, path):
+        return self._read(self.client.get(path, buffered=False))
+
+    def post(self, path, data):
+        return self._read(self.client.post(path, data=data, buffered=False))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def _open(self, request):
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            # Redirects land here too, since they are not followed
+            return e.code, len(e.read())
+        except OSError:
+            return 0, 0
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data):
+        return self._open(urllib.request.Request(
+            self.base_url + path, data=urllib.parse.urlencode(data).encode()))
+
+
+def new_session(factory, role, context, worker):
+    session = factory()
+    if role == 'admin':
+        session.post('/login', {'role': 'admin', 'username': context['admin_username'],
+                                'password': context['admin_password']})
+    elif role == 'student':
+        emails = context['emails']
+        session.post('/login', {'role': 'student', 'username': emails[worker % len(emails)],
+                                'password': PASSWORD})
+    return session
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def reset_peak_rss(pid=None):
+    """Start pid's (or this process's) peak RSS again from its current RSS.
+
+    Writing 5 to clear_refs resets VmHWM (Linux 4.0+), so the peak read
+    after a scenario is that scenario's own rather than the highest of all
+    the scenarios before it. Returns False where that is not possible.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/clear_refs", 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(pid=None):
+    """Peak resident set size of pid or of this process, since the last reset_peak_rss()."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid:
+        return None
+    # No /proc: ru_maxrss (kilobytes on Linux) is the peak of the whole run
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def request_memory(factory, scenario, context, iterations):
+    """Python memory allocated at the peak of each request, one request at a time.
+
+    Traced in its own pass, as tracemalloc slows every allocation down and
+    would distort the timings. Only possible in-process (the test client).
+    """
+    session = new_session(factory, scenario.role, context, 0)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(iterations):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            scenario.request(session, i)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return {
+        'request_peak_kb_p50': round(percentile(peaks, 0.50) / 1024, 1) if peaks else None,
+        'request_peak_kb_max': round(peaks[-1] / 1024, 1) if peaks else None,
+    }
+
+
+def run_scenario(factory, scenario, context, iterations, concurrency, server_pid=None,
+                 memory_iterations=0):
+    # Logging in is setup, not part of the measurement
+    sessions = [new_session(factory, scenario.role, context, worker)
+                for worker in range(concurrency)]
+    peak_reset = reset_peak_rss(server_pid)
+
+    def work(worker):
+        latencies, errors, size = [], 0, 0
+        for i in range(worker, iterations, concurrency):
+            started = time.perf_counter()
+            status, nbytes = scenario.request(sessions[worker], i)
+            latencies.append(time.perf_counter() - started)
+            errors += not 200 <= status < 400
+            size += nbytes
+        return latencies, errors, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(work, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for own, _, _ in results for latency in own)
+    requests = len(latencies)
+    result = {
+        'requests': requests,
+        'errors': sum(errors for _, errors, _ in results),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'mean_response_bytes': sum(size for _, _, size in results) // requests if requests else 0,
+        'peak_rss_mb': peak_rss_mb(server_pid),
+        # False: peak_rss_mb is the process's peak so far, not this scenario's
+        'peak_rss_per_scenario': peak_reset,
+    }
+    if memory_iterations:
+        result.update(request_memory(factory, scenario, context, memory_iterations))
+    return result
+
+
+def session_factory(app=None, url=None):
+    if url:
+        return lambda: HttpSession(url)
+    return lambda: TestClientSession(app)
+
+
+def run(factory, context, iterations, concurrency, heavy_iterations=None, only=None,
+        server_pid=None, memory_iterations=0):
+    results = {}
+    for scenario in scenarios(context):
+        if only and scenario.name not in only:
+            continue
+        count = heavy_iterations if scenario.heavy and heavy_iterations else iterations
+        results[scenario.name] = run_scenario(
+            factory, scenario, context, count, concurrency, server_pid,
+            min(memory_iterations, count))
+    return results
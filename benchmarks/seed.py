@@ -0,0 +1,139 @@
+"""Synthetic students and attendance, written with COPY on PostgreSQL
+and multi-row executemany elsewhere."""
+import csv
+import io
+import random
+from datetime import date, datetime, time, timedelta
+
+PASSWORD = 'benchmark'
+COURSES = ['Computer Science', 'Information Technology', 'Electrical Engineering',
+           'Civil Engineering', 'Accounting', 'Business Administration', 'Nursing',
+           'Education', 'Law', 'Medicine']
+STUDENT_COLUMNS = ('student_id', 'name', 'course', 'email', 'password', 'gender',
+                   'confirmed', 'confirmation_date', 'registration_date')
+ATTENDANCE_COLUMNS = ('student_id', 'date', 'time', 'time_in', 'time_out', 'status')
+
+
+def student_email(number):
+    return f"bench{number}@example.com"
+
+
+def student_rows(count, courses, password_hash, rng):
+    registered = datetime.now() - timedelta(days=400)
+    for number in range(count):
+        registration_date = registered + timedelta(seconds=number * 37)
+        confirmed = rng.random() < 0.95
+        yield {
+            'student_id': f"B{number:07d}",
+            'name': f"Student {number}",
+            'course': courses[number % len(courses)],
+            'email': student_email(number),
+            'password': password_hash,
+            'gender': rng.choice(('Male', 'Female')),
+            'confirmed': confirmed,
+            'confirmation_date': registration_date + timedelta(days=1) if confirmed else None,
+            'registration_date': registration_date,
+        }
+
+
+def school_days(days, end):
+    """The last `days` weekdays before end (today is left free for check-ins)."""
+    day = end
+    result = []
+    while len(result) < days:
+        day -= timedelta(days=1)
+        if day.weekday() < 5:
+            result.append(day)
+    return result[::-1]
+
+
+def attendance_rows(student_pks, days, present_rate, late_rate, rng):
+    for day in days:
+        for pk in student_pks:
+            if rng.random() >= present_rate:
+                continue
+            late = rng.random() < late_rate
+            time_in = time(8, 0) if not late else time(8, 30)
+            time_in = (datetime.combine(day, time_in) + timedelta(minutes=rng.randint(-30, 29))).time()
+            time_out = time(15, rng.randint(0, 59))
+            yield {
+                'student_id': pk,
+                'date': day,
+                'time': time_in,
+                'time_in': time_in,
+                'time_out': time_out,
+                'status': 'Late' if late else 'Present',
+            }
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bulk_insert(db, table, columns, rows, batch_size):
+    total = 0
+    if db.engine.dialect.name == 'postgresql':
+        raw = db.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for batch in batches(rows, batch_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in batch:
+                    writer.writerow(['' if row[c] is None else row[c] for c in columns])
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+                total += len(batch)
+            raw.commit()
+        finally:
+            raw.close()
+        return total
+
+    for batch in batches(rows, batch_size):
+        db.session.execute(table.insert(), batch)
+        total += len(batch)
+    db.session.commit()
+    return total
+
+
+def seed(attendance_app, app, students=1000, days=30, present_rate=0.9, late_rate=0.1,
+         courses=len(COURSES), batch_size=5000, reset=False, rng_seed=0):
+    """Create the synthetic data set and backfill the rollups; returns row counts."""
+    db = attendance_app.db
+    Student, Attendance = attendance_app.Student, attendance_app.Attendance
+    rng = random.Random(rng_seed)
+
+    with app.app_context():
+        db.create_all()
+        if reset:
+            for model in (attendance_app.StudentAttendanceRollup,
+                          attendance_app.CourseAttendanceRollup, Attendance, Student):
+                db.session.query(model).delete()
+            db.session.commit()
+
+        # One cheap hash shared by every synthetic student keeps seeding fast
+        password_hash = attendance_app.PasswordHasher(rounds=4, workers=0).hash(PASSWORD)
+        student_count = bulk_insert(
+            db, Student.__table__, STUDENT_COLUMNS,
+            student_rows(students, COURSES[:courses], password_hash, rng), batch_size)
+
+        student_pks = [pk for (pk,) in db.session.query(Student.id)
+                       .filter(Student.student_id.like('B%'), Student.confirmed.is_(True))
+                       .order_by(Student.id)]
+        attendance_count = bulk_insert(
+            db, Attendance.__table__, ATTENDANCE_COLUMNS,
+            attendance_rows(student_pks, school_days(days, date.today()),
+                            present_rate, late_rate, rng), batch_size)
+
+    result = app.test_cli_runner().invoke(args=['backfill-rollups'])
+    if result.exit_code:
+        raise RuntimeError(result.output)
+    return {'students': student_count, 'attendance': attendance_count}
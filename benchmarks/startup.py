@@ -0,0 +1,98 @@
+"""Worker startup cost: cold import of the app, warm-up and first-request latency.
+
+    python benchmarks/startup.py --runs 10
+    python benchmarks/startup.py --no-warm-up --output startup.json
+
+Every run is a fresh interpreter, as a newly forked or started worker is,
+so nothing is cached between them but the bytecode. Uses a throwaway SQLite
+database unless DATABASE_URL is set.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by the features that need them, never by `import app`
+HEAVY_MODULES = ('openpyxl', 'numpy', 'pandas', 'pyarrow', 'alembic')
+
+# Runs in the child interpreter and prints one JSON line
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app as attendance_app
+imported = time.perf_counter()
+warm_up, path = sys.argv[1:3]
+creating = time.perf_counter()
+app = attendance_app.create_app({'WARM_UP': warm_up == '1', 'LOG_LEVEL': 'WARNING'})
+ready = time.perf_counter()
+with app.app_context():
+    attendance_app.db.create_all()
+client = app.test_client()
+latencies = []
+for _ in range(2):
+    request_started = time.perf_counter()
+    status = client.get(path).status_code
+    latencies.append(time.perf_counter() - request_started)
+print(json.dumps({
+    'import_seconds': imported - started,
+    'create_app_seconds': ready - creating,
+    'first_request_seconds': latencies[0],
+    'second_request_seconds': latencies[1],
+    'status': status,
+    'templates': len(app.jinja_env.cache or ()),
+    'heavy_modules': sorted(set(sys.argv[3].split(',')) & set(sys.modules)),
+}))
+"""
+
+
+def run_once(warm_up, path):
+    output = subprocess.check_output(
+        [sys.executable, '-c', CHILD, '1' if warm_up else '0', path, ','.join(HEAVY_MODULES)],
+        cwd=ROOT, env={**os.environ, 'PYTHONPATH': ROOT}, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def milliseconds(values):
+    return {'median_ms': round(statistics.median(values) * 1000, 2),
+            'min_ms': round(min(values) * 1000, 2),
+            'max_ms': round(max(values) * 1000, 2)}
+
+
+def run(runs, warm_up, path):
+    results = [run_once(warm_up, path) for _ in range(runs)]
+    report = {'runs': runs, 'warm_up': warm_up, 'path': path,
+              'statuses': sorted({result['status'] for result in results}),
+              'templates_compiled': max(result['templates'] for result in results),
+              'heavy_modules_imported': sorted({module for result in results
+                                                for module in result['heavy_modules']})}
+    for metric in ('import', 'create_app', 'first_request', 'second_request'):
+        report[metric] = milliseconds([result[f'{metric}_seconds'] for result in results])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/login', help='the first request made')
+    parser.add_argument('--no-warm-up', dest='warm_up', action='store_false')
+    parser.add_argument('--output', help='also write the JSON report here')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{tempfile.mkdtemp()}/startup.db")
+    report = run(args.runs, args.warm_up, args.path)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    if report['heavy_modules_imported']:
+        sys.exit(f"Importing the app pulled in {', '.join(report['heavy_modules_imported'])}")
+
+
+if __name__ == '__main__':
+    main()
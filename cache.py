@@ -0,0 +1,136 @@
+"""Caching for admin listings, counts and per-student summaries.
+
+Entries live in namespaces. Invalidating a namespace bumps its generation
+number, and since the generation is part of every key, everything cached
+under the old generation is simply never read again. MemoryBackend is a
+per-process LRU with TTL; RedisBackend shares entries and generations
+between workers and works with any client exposing get/set/incr.
+
+A bump only reaches the processes sharing the backend: with MemoryBackend
+and several worker processes, the others keep serving what they cached
+until its TTL runs out. Anything run with more than one worker needs Redis.
+"""
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+MISSING = object()
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        # Generations are kept outside the LRU so they are never evicted
+        self._generations = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            expires = time.monotonic() + ttl if ttl else None
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations[namespace]
+
+    def bump(self, namespace):
+        with self._lock:
+            self._generations[namespace] += 1
+            # Entries of older generations can no longer be hit
+            stale = [key for key in self._entries if key.startswith(f"{namespace}:")]
+            for key in stale:
+                del self._entries[key]
+
+
+class RedisBackend:
+    def __init__(self, client, prefix='attendance:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return MISSING if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def generation(self, namespace):
+        return int(self.client.get(f"{self.prefix}generation:{namespace}") or 0)
+
+    def bump(self, namespace):
+        self.client.incr(f"{self.prefix}generation:{namespace}")
+
+
+SHARED_SCHEMES = ('redis://', 'rediss://', 'unix://')
+
+
+def is_shared(url):
+    """Whether a backend URL is seen, and invalidated, by every worker process."""
+    return bool(url) and url.startswith(SHARED_SCHEMES)
+
+
+def backend_from_url(url, maxsize=1024):
+    """memory:// (the default) or a redis:// URL, which needs the redis package."""
+    if is_shared(url):
+        import redis
+        return RedisBackend(redis.Redis.from_url(url))
+    return MemoryBackend(maxsize)
+
+
+class Cache:
+    def __init__(self, backend, default_ttl=60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def _key(self, namespace, key):
+        return f"{namespace}:{self.backend.generation(namespace)}:{key}"
+
+    def get_or_set(self, namespace, key, compute, ttl=None):
+        full_key = self._key(namespace, key)
+        value = self.backend.get(full_key)
+        if value is not MISSING:
+            self.hits[namespace] += 1
+            return value
+        self.misses[namespace] += 1
+        value = compute()
+        self.backend.set(full_key, value, ttl or self.default_ttl)
+        return value
+
+    def invalidate(self, namespace):
+        self.backend.bump(namespace)
+
+    def delete(self, namespace, key):
+        """Drop one entry, leaving the rest of the namespace cached."""
+        self.backend.delete(self._key(namespace, key))
+
+    def stats(self):
+        return {
+            namespace: {'hits': self.hits[namespace], 'misses': self.misses[namespace]}
+            for namespace in sorted(set(self.hits) | set(self.misses))
+        }
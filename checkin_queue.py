@@ -0,0 +1,227 @@
+"""Durable check-in queue drained into the database in batches.
+
+Check-ins are appended to a SQLite journal in WAL mode and acknowledged
+straight away. A background thread takes them out in batches, hands each
+batch to a writer callback, and deletes the entries only once the callback
+has returned. Entries still in the journal after a crash are written again
+on the next start; the writer must therefore be idempotent, which the
+(student_id, date) unique constraint on attendance guarantees.
+
+Every worker process appends to the same journal, but only one of them
+drains it at a time: the writer thread holds an exclusive lock on a file
+next to the journal, and another process takes over if that one exits.
+A batch failing with one of the `permanent` exceptions is split until the
+entries at fault are found; those are moved to a dead-letter table for an
+operator to look at, and the rest are written. Any other exception (the
+database being down, say) leaves the batch queued for the next pass.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    """Raised when the journal already holds max_pending check-ins."""
+
+
+class CheckinJournal:
+    def __init__(self, path, max_pending=10000, batch_size=500, interval=0.5, permanent=()):
+        self.path = path
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.interval = interval
+        self.permanent = tuple(permanent)
+        self._conn = None
+        self._pid = None
+        self._writer_lock = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        # Opened on first use in each process, so forked workers never share
+        # a connection inherited from the parent; callers hold self._lock
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkins ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " student_id INTEGER NOT NULL,"
+                " at TEXT NOT NULL,"
+                " kind TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_checkins_student ON checkins (student_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead_checkins ("
+                " seq INTEGER PRIMARY KEY,"
+                " student_id INTEGER NOT NULL,"
+                " at TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " error TEXT NOT NULL,"
+                " failed_at TEXT NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def append(self, student_id, when, kind='time_in'):
+        with self._lock:
+            conn = self._connect()
+            (pending,) = conn.execute("SELECT COUNT(*) FROM checkins").fetchone()
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} check-ins already waiting")
+            cursor = conn.execute(
+                "INSERT INTO checkins (student_id, at, kind) VALUES (?, ?, ?)",
+                (student_id, when.isoformat(), kind)
+            )
+        return cursor.lastrowid
+
+    def pending(self, student_id=None, limit=None):
+        """Queued (seq, student_id, when, kind) entries, oldest first."""
+        return self._entries("checkins", student_id, limit)
+
+    def dead(self, limit=None):
+        """Dead-lettered (seq, student_id, when, kind, error, failed_at) entries, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT seq, student_id, at, kind, error, failed_at FROM dead_checkins"
+                " ORDER BY seq" + (" LIMIT ?" if limit else ""), [limit] if limit else []
+            ).fetchall()
+        return [(seq, pk, datetime.fromisoformat(at), kind, error, datetime.fromisoformat(failed_at))
+                for seq, pk, at, kind, error, failed_at in rows]
+
+    def _entries(self, table, student_id, limit):
+        sql = f"SELECT seq, student_id, at, kind FROM {table}"
+        params = []
+        if student_id is not None:
+            sql += " WHERE student_id = ?"
+            params.append(student_id)
+        sql += " ORDER BY seq"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [(seq, pk, datetime.fromisoformat(at), kind) for seq, pk, at, kind in rows]
+
+    def remove(self, seqs):
+        if not seqs:
+            return
+        placeholders = ", ".join("?" * len(seqs))
+        with self._lock:
+            self._connect().execute(f"DELETE FROM checkins WHERE seq IN ({placeholders})", list(seqs))
+
+    def bury(self, entry, error):
+        """Move one queued entry to the dead-letter table."""
+        seq, student_id, when, kind = entry
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dead_checkins"
+                    " (seq, student_id, at, kind, error, failed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (seq, student_id, when.isoformat(), kind, str(error)[:1000],
+                     datetime.now().isoformat())
+                )
+                conn.execute("DELETE FROM checkins WHERE seq = ?", (seq,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        log.error("Check-in moved to the dead-letter table",
+                  extra={'seq': seq, 'student': student_id, 'at': when.isoformat(), 'error': str(error)})
+
+    def requeue(self):
+        """Put every dead-lettered entry back in the queue; returns how many."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO checkins (student_id, at, kind)"
+                    " SELECT student_id, at, kind FROM dead_checkins ORDER BY seq")
+                conn.execute("DELETE FROM dead_checkins")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def drain(self, writer):
+        """Write everything queued right now; returns the number of entries written."""
+        written = 0
+        while True:
+            batch = self.pending(limit=self.batch_size)
+            if not batch:
+                return written
+            written += self._write(writer, batch)
+
+    def _write(self, writer, batch):
+        # Halving a failing batch finds each bad entry in log2(batch_size) steps
+        try:
+            writer(batch)
+        except self.permanent as e:
+            if len(batch) == 1:
+                self.bury(batch[0], e)
+                return 0
+            middle = len(batch) // 2
+            return self._write(writer, batch[:middle]) + self._write(writer, batch[middle:])
+        self.remove([seq for seq, _, _, _ in batch])
+        return len(batch)
+
+    def _lead(self):
+        """Whether this process is the journal's writer, becoming it if nobody is."""
+        if self._writer_lock is not None:
+            fd, pid = self._writer_lock
+            if pid == os.getpid():
+                return True
+            # Inherited across a fork: only the parent's copy may keep the lock alive
+            os.close(fd)
+            self._writer_lock = None
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows): a single process is assumed
+            return True
+        fd = os.open(f"{self.path}.writer", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._writer_lock = (fd, os.getpid())
+        return True
+
+    def start(self, writer):
+        """Run drain(writer) on a daemon thread; calling it again is a no-op."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(writer,), name='checkin-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._writer_lock is not None and self._writer_lock[1] == os.getpid():
+            os.close(self._writer_lock[0])
+            self._writer_lock = None
+
+    def _run(self, writer):
+        while not self._stop.is_set():
+            try:
+                # Every worker runs this loop, but only the lock holder drains
+                if self._lead():
+                    self.drain(writer)
+            except Exception:
+                # Entries stay in the journal and are retried on the next pass
+                log.exception("Check-in writer error")
+            # Waiting between passes is what lets a rush build up into batches
+            self._stop.wait(self.interval)
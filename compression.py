@@ -0,0 +1,100 @@
+"""gzip and brotli compression of text responses.
+
+Compressor is called from an after_request hook. It picks brotli when the
+client accepts it and the brotli package is installed, gzip otherwise, and
+leaves alone small bodies, binary types, responses that already have a
+Content-Encoding and partial content. Streamed bodies are compressed as
+they go and flushed every stream_buffer_size bytes, so they keep streaming
+without a flush after every small template piece, which would all but stop
+the compression. Event streams are the exception: each chunk is an event
+and is flushed as it comes.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+class Compressor:
+    def __init__(self, min_size=1024, max_passthrough_size=1024 * 1024, gzip_level=6,
+                 brotli_quality=5, stream_buffer_size=16 * 1024):
+        self.min_size = min_size
+        # Files served with send_file are only compressed up to this size
+        self.max_passthrough_size = max_passthrough_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stream_buffer_size = stream_buffer_size
+
+    def encoding(self, request):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted.quality('br') > 0:
+            return 'br'
+        if accepted.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    def compressor(self, encoding):
+        """(compress(chunk), flush(), finish()) for one body; flush() emits what is buffered so far."""
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    def __call__(self, request, response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or not response.mimetype.startswith(COMPRESSIBLE_TYPES)):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.encoding(request)
+        if encoding is None or request.method == 'HEAD':
+            return response
+
+        if response.direct_passthrough:
+            length = response.content_length
+            if length is None or length > self.max_passthrough_size:
+                return response
+            response.direct_passthrough = False
+            response.make_sequence()
+        if response.is_streamed:
+            response.response = self._stream(response.response, encoding,
+                                             flush_each=response.mimetype == 'text/event-stream')
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            compress, _, finish = self.compressor(encoding)
+            response.set_data(compress(body) + finish())
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # The compressed body is a different representation
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+    def _stream(self, chunks, encoding, flush_each=False):
+        compress, flush, finish = self.compressor(encoding)
+        unflushed = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                data = compress(chunk)
+                unflushed += len(chunk)
+                if flush_each or unflushed >= self.stream_buffer_size:
+                    data += flush()
+                    unflushed = 0
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
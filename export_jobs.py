@@ -0,0 +1,182 @@
+"""Background export jobs with content-addressed artifacts.
+
+Exports are built on a small thread pool instead of inside the request.
+Each job writes its file under a key covering everything the file depends
+on (which export, its parameters and a watermark of the data behind it),
+so asking again for an export whose data has not changed finds the
+finished file at once, and asking while it is being built joins the
+running job. Jobs are tracked in a SQLite table next to the artifacts,
+shared by the workers of a host; artifacts expire ttl seconds after they
+are built and purge() removes them, which submit() also does now and then.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 600
+
+Job = namedtuple('Job', 'id key status filename error created finished expires')
+
+
+def content_key(*parts):
+    """Stable key for an artifact built from parts (anything with a deterministic repr)."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExportJobs:
+    def __init__(self, directory, workers=2, ttl=86400):
+        self.directory = directory
+        self.workers = workers
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._last_purge = 0
+        os.makedirs(os.path.join(directory, 'artifacts'), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " filename TEXT NOT NULL,"
+                " error TEXT,"
+                " pid INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " finished REAL,"
+                " expires REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_key ON jobs (key)")
+
+    def _connect(self):
+        # One connection per thread and process, as in session_store
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(os.path.join(self.directory, 'jobs.db'), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _pool(self):
+        # Created on first use in each process, so forked workers get their own threads
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='export')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def path(self, key):
+        return os.path.join(self.directory, 'artifacts', key)
+
+    def _job(self, row):
+        job_id, key, status, filename, error, pid, created, finished, expires = row
+        if status in ('queued', 'running') and not process_alive(pid):
+            status, error = 'failed', "The worker building this export stopped"
+        return Job(job_id, key, status, filename, error, created, finished, expires)
+
+    def get(self, job_id):
+        row = self._connect().execute(
+            "SELECT id, key, status, filename, error, pid, created, finished, expires"
+            " FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def submit(self, key, filename, build):
+        """The job building key's artifact with build(path), started unless one exists.
+
+        A finished, unexpired job for the same key is returned as it is, as
+        is one still queued or running; otherwise build runs in the pool.
+        """
+        self._purge_now_and_then()
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for row in conn.execute(
+                    "SELECT id, key, status, filename, error, pid, created, finished, expires"
+                    " FROM jobs WHERE key = ? AND status != 'failed' ORDER BY created DESC", (key,)):
+                job = self._job(row)
+                if job.status in ('queued', 'running'):
+                    return job
+                if job.status == 'done' and job.expires > now and os.path.exists(self.path(key)):
+                    return job
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, key, status, filename, pid, created)"
+                " VALUES (?, ?, 'queued', ?, ?, ?)", (job_id, key, filename, os.getpid(), now))
+        self._pool().submit(self._run, job_id, key, build)
+        return self.get(job_id)
+
+    def _run(self, job_id, key, build):
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job_id,))
+        # Built aside and renamed, so a download never sees half a file
+        tmp = f"{self.path(key)}.{job_id}.tmp"
+        try:
+            build(tmp)
+            os.replace(tmp, self.path(key))
+        except Exception as e:
+            log.exception("Export job failed", extra={'job_id': job_id})
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            with conn:
+                conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ?",
+                             (str(e) or type(e).__name__, time.time(), job_id))
+            return
+        finished = time.time()
+        with conn:
+            conn.execute("UPDATE jobs SET status = 'done', finished = ?, expires = ? WHERE id = ?",
+                         (finished, finished + self.ttl, job_id))
+
+    def purge(self):
+        """Remove expired artifacts, stale jobs and leftover partial files; returns how many artifacts went."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            expired = {key for (key,) in conn.execute(
+                "SELECT key FROM jobs WHERE status = 'done' AND expires <= ?", (now,))}
+            # A newer job may have rebuilt the same artifact
+            expired -= {key for (key,) in conn.execute(
+                "SELECT key FROM jobs WHERE status != 'failed' AND (expires IS NULL OR expires > ?)",
+                (now,))}
+            conn.execute("DELETE FROM jobs WHERE (status = 'done' AND expires <= ?)"
+                         " OR (status != 'done' AND created <= ?)", (now, now - self.ttl))
+        removed = 0
+        for key in expired:
+            try:
+                os.remove(self.path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        artifacts = os.path.join(self.directory, 'artifacts')
+        for name in os.listdir(artifacts):
+            path = os.path.join(artifacts, name)
+            if name.endswith('.tmp') and os.path.getmtime(path) < now - self.ttl:
+                os.remove(path)
+        return removed
+
+    def _purge_now_and_then(self):
+        if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            self.purge()
@@ -0,0 +1,184 @@
+"""Request metrics, structured logs and a sampling profiler.
+
+Metrics are kept per process and rendered in the Prometheus text format.
+The profiler samples the request thread's stack on a timer and writes
+folded stacks ("a;b;c 12" lines), which flamegraph.pl, speedscope and
+similar tools read directly.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.setdefault(labels, {'buckets': [0] * len(self.buckets),
+                                                      'sum': 0.0, 'count': 0})
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bucket_labels = self.label_names + ('le',)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['buckets']):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(bucket_labels, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(bucket_labels, labels + ('+Inf',))} {series['count']}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series['sum']}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series['count']}")
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        metric = CounterMetric(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, extra_lines=()):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.extend(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields passed to the logger."""
+
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items()
+                      if key not in self.RESERVED})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(names, level='INFO', fmt='json'):
+    """Give the named loggers one stderr handler in fmt, leaving every other logger alone.
+
+    The root logger belongs to whatever hosts the app (gunicorn, a test
+    runner, the flask CLI), so nothing is added there; the named loggers stop
+    propagating to it instead, which keeps their records from being printed
+    twice. Calling it again replaces the handler rather than adding another.
+    """
+    handler = logging.StreamHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    for name in names:
+        logger = logging.getLogger(name)
+        logger.handlers[:] = [handler]
+        logger.setLevel(level)
+        logger.propagate = False
+
+
+class StackSampler:
+    """Samples one thread's Python stack every interval seconds until stopped."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump(self, directory, name):
+        """Write the folded stacks to directory/<time>-<name>.folded and return the path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.folded")
+        with open(path, 'w') as output:
+            for stack, count in self.samples.most_common():
+                output.write(f"{stack} {count}\n")
+        return path
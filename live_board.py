@@ -0,0 +1,328 @@
+"""Live attendance board streamed to browsers as server-sent events.
+
+Check-ins are published as they commit. Each process keeps the latest of
+them in a ring (EventLog) that every open stream reads from its own cursor,
+so publishing costs the same however many viewers are connected; a viewer
+that falls behind the ring, or reconnects to another worker, starts over
+from a snapshot. A snapshot is the day's present students as a bitmap,
+loaded from the database once and then kept current by the same events, so
+a new viewer costs no attendance query until the bitmap is resync seconds old.
+
+Events reach the other workers through a broker: memory:// keeps them in the
+process (a single worker), sqlite:///path relays them through a SQLite file
+shared by the workers of a host, and redis:// through Redis pub/sub, which
+needs the redis package.
+"""
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+from itertools import islice
+
+log = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = 15
+# How long a browser waits before reconnecting a dropped stream
+RETRY_MS = 3000
+BUSY_RETRY_MS = 30000
+
+Board = namedtuple('Board', 'present loaded')
+
+
+class DayBitmap:
+    """Set of student ids (small non-negative ints) stored one bit each."""
+
+    def __init__(self, ids=()):
+        self.bits = bytearray()
+        for student_id in ids:
+            self.add(student_id)
+
+    def add(self, student_id):
+        index, bit = divmod(student_id, 8)
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+        self.bits[index] |= 1 << bit
+
+    def __contains__(self, student_id):
+        index, bit = divmod(student_id, 8)
+        return index < len(self.bits) and bool(self.bits[index] >> bit & 1)
+
+    def __len__(self):
+        return int.from_bytes(self.bits, 'little').bit_count()
+
+    def encode(self):
+        """Base64 of the bytes; student id n is bit n % 8 of byte n // 8."""
+        return base64.b64encode(bytes(self.bits)).decode('ascii')
+
+
+class EventLog:
+    """The latest events of this process, numbered from 1, shared by all streams."""
+
+    def __init__(self, size=4096):
+        self._events = deque(maxlen=size)
+        self.latest = 0
+        self._changed = threading.Condition()
+
+    def append(self, events):
+        with self._changed:
+            for event in events:
+                self.latest += 1
+                self._events.append(event)
+            self._changed.notify_all()
+            return self.latest
+
+    def since(self, seq):
+        """(latest, events after seq), or None when some of those were dropped already."""
+        with self._changed:
+            oldest = self.latest - len(self._events) + 1
+            if seq > self.latest or seq + 1 < oldest:
+                return None
+            return self.latest, list(islice(self._events, seq + 1 - oldest, None))
+
+    def wait(self, seq, timeout):
+        """Block until there are events after seq; False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.latest > seq, timeout)
+
+
+class MemoryBroker:
+    """A single process: there is nobody else to tell."""
+
+    def publish(self, payload):
+        pass
+
+    def start(self, deliver):
+        pass
+
+
+class SQLiteBroker:
+    """Relays payloads between the processes of a host through a SQLite table."""
+
+    def __init__(self, path, interval=0.5, retention=600):
+        self.path = path
+        self.interval = interval
+        self.retention = retention
+        self._local = threading.local()
+        self._last_trim = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " payload TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # One connection per thread and process, as in session_store
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def publish(self, payload):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO events (payload, created) VALUES (?, ?)", (payload, now))
+            if now - self._last_trim > self.retention:
+                self._last_trim = now
+                conn.execute("DELETE FROM events WHERE created < ?", (now - self.retention,))
+
+    def start(self, deliver):
+        (last,) = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        threading.Thread(target=self._relay, args=(deliver, last),
+                         name='live-board-relay', daemon=True).start()
+
+    def _relay(self, deliver, last):
+        while True:
+            time.sleep(self.interval)
+            try:
+                rows = self._connect().execute(
+                    "SELECT id, payload FROM events WHERE id > ? ORDER BY id", (last,)).fetchall()
+            except sqlite3.Error:
+                log.exception("Live board relay failed")
+                continue
+            for last, payload in rows:
+                deliver(payload)
+
+
+class RedisBroker:
+    """Relays payloads between processes and hosts over a Redis pub/sub channel."""
+
+    def __init__(self, client, channel='attendance:live'):
+        self.client = client
+        self.channel = channel
+
+    def publish(self, payload):
+        self.client.publish(self.channel, payload)
+
+    def start(self, deliver):
+        threading.Thread(target=self._relay, args=(deliver,),
+                         name='live-board-relay', daemon=True).start()
+
+    def _relay(self, deliver):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    deliver(message['data'].decode())
+            except Exception:
+                log.exception("Live board relay failed")
+                time.sleep(1)
+
+
+def broker_from_url(url):
+    """memory:// (the default), sqlite:///path/to/live.db or a redis:// URL."""
+    if url.startswith('sqlite:///'):
+        return SQLiteBroker(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis
+        return RedisBroker(redis.Redis.from_url(url))
+    if url.startswith('memory://'):
+        return MemoryBroker()
+    raise ValueError(f"Unsupported live board broker URL: {url}")
+
+
+def sse(event, data, event_id=None):
+    """One server-sent event; data is sent as JSON."""
+    lines = f"id: {event_id}\n" if event_id else ''
+    return f"{lines}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class LiveBoard:
+    """Check-in events and per-day present bitmaps of this process.
+
+    Events are dicts with 'day' (ISO date), 'student' (Student.id), 'kind'
+    and 'time'. load_present(day) returns the ids of the students with
+    attendance on day; it is called from a request, never from a stream.
+    """
+
+    def __init__(self, broker, load_present, log_size=4096, resync=300, days=2,
+                 max_streams=200, stream_seconds=600, batch_seconds=0.5):
+        self.broker = broker
+        self.load_present = load_present
+        self.log_size = log_size
+        self.resync = resync
+        self.days = days
+        self.max_streams = max_streams
+        # Streams end after this long and the browser reconnects, so a worker's
+        # threads are never held indefinitely and every viewer resyncs now and then
+        self.stream_seconds = stream_seconds
+        # A roll call is a burst of check-ins; each stream sends them together
+        self.batch_seconds = batch_seconds
+        self.streams = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _process(self):
+        # Set up on first use in each process, so forked workers get their own
+        # log and relay thread and recognise each other's events
+        with self._lock:
+            if self._pid != os.getpid():
+                self.origin = uuid.uuid4().hex
+                self.log = EventLog(self.log_size)
+                self._boards = OrderedDict()
+                self.broker.start(self._deliver)
+                self._pid = os.getpid()
+
+    def publish(self, events):
+        """Announce committed check-ins to this process's streams and the other workers."""
+        if not events:
+            return
+        self._process()
+        self._apply(events)
+        try:
+            self.broker.publish(json.dumps({'origin': self.origin, 'events': events}))
+        except Exception:
+            # The check-ins are committed either way; other workers catch up on their next resync
+            log.exception("Live board publish failed")
+
+    def _deliver(self, payload):
+        message = json.loads(payload)
+        if message['origin'] != self.origin:
+            self._apply(message['events'])
+
+    def _apply(self, events):
+        with self._lock:
+            for event in events:
+                board = self._boards.get(event['day'])
+                if board is not None:
+                    board.present.add(event['student'])
+            self.log.append(events)
+
+    def snapshot(self, day):
+        """(seq, DayBitmap) of the students present on day as of event seq.
+
+        The bitmap is loaded when missing or older than resync seconds; events
+        committed while it loads are applied to it from the log.
+        """
+        self._process()
+        key = day.isoformat()
+        with self._lock:
+            board = self._boards.get(key)
+            if board is not None and time.monotonic() - board.loaded < self.resync:
+                self._boards.move_to_end(key)
+                return self.log.latest, board.present
+            start = self.log.latest
+        present = DayBitmap(self.load_present(day))
+        with self._lock:
+            # Too many events while loading to replay means the load saw them anyway
+            for event in (self.log.since(start) or (None, ()))[1]:
+                if event['day'] == key:
+                    present.add(event['student'])
+            self._boards[key] = Board(present, time.monotonic())
+            self._boards.move_to_end(key)
+            while len(self._boards) > self.days:
+                self._boards.popitem(last=False)
+            return self.log.latest, present
+
+    def event_id(self, seq):
+        return f"{self.origin}:{seq}"
+
+    def resume(self, last_event_id):
+        """The seq to continue a reconnecting stream from, or None if it needs a snapshot."""
+        self._process()
+        origin, _, seq = (last_event_id or '').partition(':')
+        if origin != self.origin or not seq.isdigit() or self.log.since(int(seq)) is None:
+            return None
+        return int(seq)
+
+    def stream(self, day, seq, prelude=''):
+        """SSE text: prelude, then day's check-ins after seq as 'checkins' events."""
+        with self._lock:
+            busy = self.streams >= self.max_streams
+            if not busy:
+                self.streams += 1
+        if busy:
+            yield f"retry: {BUSY_RETRY_MS}\n\n" + sse('busy', {})
+            return
+        day = day.isoformat()
+        deadline = time.monotonic() + self.stream_seconds
+        try:
+            yield f"retry: {RETRY_MS}\n\n" + prelude
+            while time.monotonic() < deadline:
+                if not self.log.wait(seq, HEARTBEAT):
+                    yield ": keep-alive\n\n"
+                    continue
+                time.sleep(self.batch_seconds)
+                since = self.log.since(seq)
+                if since is None:
+                    # Fell behind the log: the browser starts over with a snapshot
+                    yield sse('reset', {})
+                    return
+                seq, events = since
+                checkins = [[event['student'], event['kind'], event['time']]
+                            for event in events if event['day'] == day]
+                if checkins:
+                    yield sse('checkins', checkins, self.event_id(seq))
+        finally:
+            with self._lock:
+                self.streams -= 1
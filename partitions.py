@@ -0,0 +1,108 @@
+"""Monthly range partitions of the attendance table (PostgreSQL).
+
+attendance is declared PARTITION BY RANGE (date) with one partition per
+month, named attendance_yYYYYmMM. Queries filtering on date only touch the
+partitions of the months they cover, and retiring a month is a DETACH and
+DROP instead of a large DELETE. The app creates the coming months ahead of
+time; rows for any other month (a back-dated correction, a backfill) land
+in the DEFAULT partition attendance_default instead of failing. Creating
+that month's partition later moves them out of it.
+"""
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+PARENT = 'attendance'
+DEFAULT_PARTITION = f'{PARENT}_default'
+PARTITION_NAME = re.compile(r'^attendance_y(\d{4})m(\d{2})$')
+# Serialises partition changes between workers starting at the same time
+LOCK_KEY = 0x61747470
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT}_y{month.year}m{month.month:02d}"
+
+
+def existing_partitions(connection):
+    """{first day of month: partition name} for the attached monthly partitions."""
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"), {'parent': PARENT})
+    partitions = {}
+    for (name,) in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_default_partition(connection):
+    """Create attendance_default, which takes the rows no monthly partition covers."""
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+
+
+def default_partition_rows(connection, month):
+    """Rows of the month waiting in the default partition."""
+    if connection.execute(text("SELECT to_regclass(:name)"),
+                          {'name': DEFAULT_PARTITION}).scalar() is None:
+        return 0
+    return connection.execute(text(
+        f"SELECT COUNT(*) FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end"),
+        {'start': month, 'end': add_months(month, 1)}).scalar()
+
+
+def create_partitions(connection, start, end):
+    """Create the missing partitions from start's month to end's month; returns their names.
+
+    A month with rows in the default partition is built as a plain table,
+    filled with those rows and attached, since PostgreSQL refuses a new
+    partition whose rows are still in the default one.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': LOCK_KEY})
+    existing = existing_partitions(connection)
+    created = []
+    month = month_start(start)
+    while month <= end:
+        if month not in existing:
+            name = partition_name(month)
+            # Bounds are dates generated here, never user input
+            bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            if default_partition_rows(connection, month):
+                connection.execute(text(
+                    f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                connection.execute(text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    f"WHERE date >= :start AND date < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"),
+                    {'start': month, 'end': add_months(month, 1)})
+                connection.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}"))
+            else:
+                connection.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} {bounds}"))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def remove_partitions(connection, before, detach_only=False):
+    """Detach, and unless detach_only drop, the partitions of months ending before `before`."""
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': LOCK_KEY})
+    removed = []
+    for month, name in sorted(existing_partitions(connection).items()):
+        if add_months(month, 1) > before:
+            break
+        connection.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if not detach_only:
+            connection.execute(text(f"DROP TABLE {name}"))
+        removed.append(name)
+    return removed
@@ -0,0 +1,174 @@
+"""Password hashing off the request thread, and failed-login throttling.
+
+bcrypt is deliberately slow, so hashing and verification run in a small
+process pool and the request thread only waits on the result. The pool is
+created lazily, which keeps it out of the parent when servers fork workers.
+When it is saturated, callers are turned away after a short wait instead of
+tying up their thread. Hashes are compatible with the ones Flask-Bcrypt
+produced before.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import bcrypt
+
+# bcrypt only looks at the first 72 bytes; older releases truncated silently
+MAX_PASSWORD_BYTES = 72
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing jobs are already queued."""
+
+
+def _encode(password):
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _hash_many(passwords, rounds):
+    return [_hash(password, rounds) for password in passwords]
+
+
+def _check(hashed, password):
+    try:
+        return bcrypt.checkpw(_encode(password), hashed.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
+
+class PasswordHasher:
+    def __init__(self, rounds=12, workers=2, max_pending=None, timeout=30, wait=0.5):
+        """workers=0 hashes inline on the calling thread (handy for tests and CLI).
+
+        Up to max_pending jobs may be queued; a caller finding the queue full
+        waits at most wait seconds for a place before PasswordHasherBusy.
+        """
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(max_pending or max(workers, 1) * 4)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait):
+            raise PasswordHasherBusy("Password hashing queue is full")
+        try:
+            return self._executor().submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, hashed, password):
+        return self._run(_check, hashed, password)
+
+    @contextmanager
+    def bulk(self, chunk_size=4):
+        """Yields hash_many(passwords) -> hashes, run on the pool logins use.
+
+        For imports: passwords go in chunks of chunk_size with at most one
+        chunk per worker in flight, so a login arriving mid-import waits for
+        a chunk, not the whole file.
+        """
+        if not self.workers:
+            yield lambda passwords: _hash_many(passwords, self.rounds)
+            return
+
+        def hash_many(passwords):
+            passwords = list(passwords)
+            pool = self._executor()
+            hashes = []
+            in_flight = deque()
+            for offset in range(0, len(passwords), chunk_size):
+                in_flight.append(pool.submit(_hash_many, passwords[offset:offset + chunk_size],
+                                             self.rounds))
+                if len(in_flight) >= self.workers:
+                    hashes.extend(in_flight.popleft().result())
+            while in_flight:
+                hashes.extend(in_flight.popleft().result())
+            return hashes
+        yield hash_many
+
+    def needs_rehash(self, hashed):
+        """True when hashed was made with a different work factor than the current one."""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+class LoginThrottle:
+    """Sliding-window count of failed logins per key, checked before any hashing.
+
+    Memory stays bounded under credential stuffing: each key keeps only its
+    latest max_failures times, keys are ordered by their latest failure so
+    expired ones are dropped from the front as new failures come in, and
+    beyond max_keys the least recently failing keys are forgotten.
+    """
+
+    def __init__(self, max_failures=5, window=300, max_keys=100000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._failures:
+            key, failures = next(iter(self._failures.items()))
+            if failures[-1] > now - self.window:
+                break
+            del self._failures[key]
+
+    def _prune(self, key, now):
+        failures = self._failures.get(key, ())
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            self._failures.pop(key, None)
+        return failures
+
+    def blocked(self, key):
+        with self._lock:
+            return len(self._prune(key, time.monotonic())) >= self.max_failures
+
+    def failed(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            failures = self._failures.pop(key, None) or deque(maxlen=self.max_failures)
+            failures.append(now)
+            self._failures[key] = failures
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def __len__(self):
+        return len(self._failures)
+
+    def succeeded(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
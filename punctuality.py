@@ -0,0 +1,109 @@
+"""Schedule-aware punctuality analytics, vectorised with pandas and NumPy.
+
+classify() lines every attendance row up with its course's session window
+for that weekday (a course row without a weekday covers the other days, and
+courses without any schedule use the default window) and derives lateness,
+early leave and time spent as whole columns at once. summarise() folds
+classified rows into monthly sums per student or course; sums rather than
+averages are kept so that months add up to any longer range.
+"""
+import numpy as np
+import pandas as pd
+
+RECORD_COLUMNS = ('id', 'student_id', 'course', 'date', 'time_in', 'time_out', 'status')
+SCHEDULE_COLUMNS = ('course', 'weekday', 'starts_at', 'ends_at', 'grace_minutes')
+CLASSIFIED_COLUMNS = ('attendance_id', 'date', 'student_id', 'course', 'late', 'minutes_late',
+                      'early_leave', 'minutes_early', 'duration_minutes')
+SUM_COLUMNS = ('records', 'late', 'early_leave', 'checked_out', 'minutes_late', 'minutes_early',
+               'duration_minutes')
+WINDOW_COLUMNS = ['start', 'end', 'grace']
+
+
+def minutes(times):
+    """Minutes after midnight for a Series of datetime.time, NaN where missing."""
+    return pd.to_timedelta(times.astype('string')).dt.total_seconds() / 60
+
+
+def windows(schedules):
+    """(per course and weekday, per course) session windows in minutes."""
+    schedules = pd.DataFrame(schedules, columns=SCHEDULE_COLUMNS)
+    frame = pd.DataFrame({
+        'course': schedules['course'],
+        'weekday': schedules['weekday'],
+        'start': minutes(schedules['starts_at']),
+        'end': minutes(schedules['ends_at']),
+        'grace': schedules['grace_minutes'].fillna(0).astype(float),
+    })
+    by_day = frame[frame['weekday'].notna()].astype({'weekday': int})
+    every_day = frame[frame['weekday'].isna()].drop(columns='weekday')
+    return by_day, every_day
+
+
+def classify(records, schedules, default):
+    """One CLASSIFIED_COLUMNS row per record.
+
+    records holds RECORD_COLUMNS, schedules SCHEDULE_COLUMNS rows and default
+    is the (starts_at, ends_at, grace_minutes) window of unscheduled courses.
+    A record is late when time_in is past the start plus grace, and counts
+    the minutes from the start; early_leave is empty until it has a time_out.
+    The record's status is passed through for status_changes().
+    """
+    records = pd.DataFrame(records, columns=RECORD_COLUMNS)
+    by_day, every_day = windows(schedules)
+    frame = records.assign(weekday=pd.to_datetime(records['date']).dt.weekday)
+    frame = frame.merge(by_day, on=['course', 'weekday'], how='left')
+    frame = frame.merge(every_day, on='course', how='left', suffixes=('', '_any'))
+    start, end, grace = default
+    for column, fallback in zip(WINDOW_COLUMNS, (minutes(pd.Series([start]))[0],
+                                                 minutes(pd.Series([end]))[0], grace)):
+        frame[column] = frame[column].fillna(frame[f'{column}_any']).fillna(fallback)
+
+    time_in = minutes(frame['time_in'])
+    time_out = minutes(frame['time_out'])
+    late = (time_in > frame['start'] + frame['grace']).to_numpy()
+    early = (time_out < frame['end']).to_numpy()
+    checked_out = time_out.notna().to_numpy()
+    return pd.DataFrame({
+        'attendance_id': frame['id'],
+        'date': frame['date'],
+        'student_id': frame['student_id'],
+        'course': frame['course'],
+        'late': late,
+        'minutes_late': np.where(late, np.rint(time_in - frame['start']), 0).astype(int),
+        'early_leave': pd.array(np.where(checked_out, early, None), dtype='boolean'),
+        'minutes_early': pd.array(np.where(checked_out & early, np.rint(frame['end'] - time_out),
+                                           np.where(checked_out, 0, None)), dtype='Int64'),
+        'duration_minutes': pd.array(np.rint(time_out - time_in).where(
+            time_in.notna() & time_out.notna()), dtype='Int64'),
+        'status': frame['status'],
+    })
+
+
+def status_changes(classified):
+    """{status: rows of classified to set it on} where Present/Late disagrees with the schedule."""
+    status = classified['status']
+    return {
+        'Late': classified[classified['late'] & (status == 'Present')],
+        'Present': classified[~classified['late'] & (status == 'Late')],
+    }
+
+
+def summarise(classified, owner):
+    """Monthly SUM_COLUMNS per owner ('student_id' or 'course'), with a period_start column."""
+    frame = classified.assign(
+        period_start=pd.to_datetime(classified['date']).dt.to_period('M').dt.start_time.dt.date,
+        records=1,
+        late=classified['late'].astype(int),
+        early_leave=classified['early_leave'].fillna(False).astype(int),
+        checked_out=classified['early_leave'].notna().astype(int),
+    )
+    sums = (frame.groupby([owner, 'period_start'])[list(SUM_COLUMNS)]
+            .sum(min_count=0)
+            .reset_index())
+    return sums.astype({column: int for column in SUM_COLUMNS})
+
+
+def sql_rows(frame, columns=None):
+    """DataFrame rows as dicts of plain Python values, None for missing ones."""
+    frame = frame[list(columns)] if columns else frame
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
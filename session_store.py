@@ -0,0 +1,272 @@
+"""Server-side sessions, with the logged-in user's principal cached next to them.
+
+The cookie only carries a random session id; the data lives in a store that
+the workers of a host share, either a SQLite database in WAL mode or a
+directory of files. Alongside the sessions the store keeps a principal per
+owner (the user the session belongs to): the profile fields the auth
+decorators check, so views can skip loading the user row. Whoever changes
+the user calls revoke(owner), which drops the principal, and with
+logout=True every session of that owner as well.
+"""
+import os
+import pickle
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# token_urlsafe(32) ids; anything else in the cookie is ignored, which also
+# keeps cookie values out of file paths
+SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{43}$')
+PURGE_INTERVAL = 3600
+
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+
+class SQLiteSessionStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY,"
+                " owner INTEGER,"
+                " data BLOB NOT NULL,"
+                " expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_owner ON sessions (owner)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS principals ("
+                " owner INTEGER PRIMARY KEY,"
+                " data BLOB NOT NULL,"
+                " expires REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # One connection per thread and process; forked workers open their own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _fetch(self, sql, key):
+        row = self._connect().execute(sql, (key, time.time())).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def get(self, sid):
+        return self._fetch("SELECT data FROM sessions WHERE sid = ? AND expires > ?", sid)
+
+    def set(self, sid, data, ttl, owner=None):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (sid, owner, data, expires) VALUES (?, ?, ?, ?)",
+                         (sid, owner, pickle.dumps(data), time.time() + ttl))
+        self._purge_now_and_then()
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def principal(self, owner):
+        return self._fetch("SELECT data FROM principals WHERE owner = ? AND expires > ?", owner)
+
+    def set_principal(self, owner, data, ttl):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO principals (owner, data, expires) VALUES (?, ?, ?)",
+                         (owner, pickle.dumps(data), time.time() + ttl))
+
+    def revoke(self, owner, logout=False):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM principals WHERE owner = ?", (owner,))
+            if logout:
+                conn.execute("DELETE FROM sessions WHERE owner = ?", (owner,))
+
+    def purge(self):
+        """Delete expired sessions and principals; returns how many sessions went."""
+        now = time.time()
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,)).rowcount
+            conn.execute("DELETE FROM principals WHERE expires <= ?", (now,))
+        return removed
+
+    def _purge_now_and_then(self):
+        if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            self.purge()
+
+
+class FilesystemSessionStore:
+    """sessions/<sid>, principals/<owner> and owners/<owner>/<sid> markers under directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._last_purge = 0
+        for name in ('sessions', 'principals', 'owners'):
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *map(str, parts))
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                expires, owner, data = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        return data if expires > time.time() else None
+
+    def _write(self, path, record):
+        # Written aside and renamed, so readers never see half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(record, f)
+        os.replace(tmp, path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, sid):
+        return self._read(self._path('sessions', sid))
+
+    def set(self, sid, data, ttl, owner=None):
+        self._write(self._path('sessions', sid), (time.time() + ttl, owner, data))
+        if owner is not None:
+            os.makedirs(self._path('owners', owner), exist_ok=True)
+            open(self._path('owners', owner, sid), 'a').close()
+        self._purge_now_and_then()
+
+    def delete(self, sid):
+        self._remove(self._path('sessions', sid))
+
+    def principal(self, owner):
+        return self._read(self._path('principals', owner))
+
+    def set_principal(self, owner, data, ttl):
+        self._write(self._path('principals', owner), (time.time() + ttl, owner, data))
+
+    def revoke(self, owner, logout=False):
+        self._remove(self._path('principals', owner))
+        if logout:
+            try:
+                sids = os.listdir(self._path('owners', owner))
+            except FileNotFoundError:
+                return
+            for sid in sids:
+                self._remove(self._path('sessions', sid))
+                self._remove(self._path('owners', owner, sid))
+
+    def purge(self):
+        removed = 0
+        for kind in ('sessions', 'principals'):
+            for name in os.listdir(self._path(kind)):
+                path = self._path(kind, name)
+                if not name.endswith('.tmp') and self._read(path) is None:
+                    self._remove(path)
+                    removed += kind == 'sessions'
+        for owner in os.listdir(self._path('owners')):
+            for sid in os.listdir(self._path('owners', owner)):
+                if not os.path.exists(self._path('sessions', sid)):
+                    self._remove(self._path('owners', owner, sid))
+            try:
+                os.rmdir(self._path('owners', owner))
+            except OSError:
+                # Still has sessions
+                pass
+        return removed
+
+    def _purge_now_and_then(self):
+        if time.monotonic() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            self.purge()
+
+
+def store_from_url(url):
+    """sqlite:///path/to/sessions.db or file:///path/to/directory."""
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):])
+    if url.startswith('file://'):
+        return FilesystemSessionStore(url[len('file://'):])
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid or new_session_id()
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        self.replaced_sid = None
+
+    def rotate(self):
+        """Switch to a fresh session id (on login), retiring the current one."""
+        self.replaced_sid = self.replaced_sid or self.sid
+        self.sid = new_session_id()
+        self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface over a session store; owner_key names the session's owner."""
+
+    def __init__(self, store, owner_key=None):
+        self.store = store
+        self.owner_key = owner_key
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and SESSION_ID.match(sid):
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSession(data, sid=sid)
+        return ServerSession(new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if session.replaced_sid:
+            self.store.delete(session.replaced_sid)
+        if not session:
+            if session.modified:
+                if not session.new:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        if session.modified:
+            self.store.set(session.sid, dict(session),
+                           ttl=app.permanent_session_lifetime.total_seconds(),
+                           owner=session.get(self.owner_key) if self.owner_key else None)
+        if session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(name, session.sid,
+                                expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app),
+                                domain=domain, path=path,
+                                secure=self.get_cookie_secure(app),
+                                samesite=self.get_cookie_samesite(app))
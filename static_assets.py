@@ -0,0 +1,56 @@
+"""Content-hashed static URLs that browsers may cache for good.
+
+url_for('static', filename=...) gains a v=<hash of the file> argument, so a
+changed file gets a new URL, and responses to a URL carrying the current
+hash are marked immutable for a year. Hashes are remembered per file until
+its modification time changes.
+"""
+import hashlib
+import os
+import threading
+
+from werkzeug.security import safe_join
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class StaticAssets:
+    def __init__(self, static_folder, hash_length=12):
+        self.static_folder = static_folder
+        self.hash_length = hash_length
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def version(self, filename):
+        """Hash of a static file's content, or None when there is no such file."""
+        path = safe_join(self.static_folder, filename) if self.static_folder else None
+        if path is None:
+            return None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:self.hash_length]
+        with self._lock:
+            self._hashes[path] = (mtime, digest)
+        return digest
+
+    def add_version(self, endpoint, values):
+        """url_defaults callback."""
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = self.version(values['filename'])
+            if version:
+                values['v'] = version
+
+    def cache_headers(self, request, response):
+        """Mark a static response immutable when it was asked for by its current hash."""
+        version = request.args.get('v')
+        if (request.endpoint == 'static' and version and response.status_code in (200, 304)
+                and version == self.version(request.view_args['filename'])):
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
@@ -0,0 +1,89 @@
+"""Reading student rosters (CSV or xlsx) for bulk import.
+
+Rows are streamed: CSV through the csv module and xlsx through openpyxl's
+read-only mode, so a file with thousands of students is never loaded whole.
+Headers are matched case-insensitively, and spaces count as underscores
+("Student ID" is student_id). Every row is validated on its own, so one bad
+row is reported and skipped without stopping the import.
+"""
+import csv
+import io
+import re
+
+COLUMNS = ('student_id', 'name', 'course', 'email', 'gender', 'password')
+GENDERS = ('male', 'female', 'other')
+EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# The lengths of the Student columns
+MAX_LENGTHS = {'student_id': 20, 'name': 100, 'course': 100, 'email': 100}
+
+
+class ImportFileError(Exception):
+    """Raised when the file as a whole cannot be read (format, missing columns)."""
+
+
+def _header(cells):
+    header = [re.sub(r'\s+', '_', str(cell or '').strip().lower()) for cell in cells]
+    missing = [column for column in COLUMNS if column not in header]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+    return [header.index(column) for column in COLUMNS]
+
+
+def _csv_rows(stream):
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    try:
+        positions = _header(next(reader, []))
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, [row[i] if i < len(row) else '' for i in positions]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Unreadable CSV file: {e}") from e
+
+
+def _xlsx_rows(stream):
+    # Imported here so that importing this module stays cheap
+    from openpyxl import load_workbook
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Unreadable xlsx file: {e}") from e
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        positions = _header(next(rows, ()))
+        for line, row in enumerate(rows, start=2):
+            if any(cell not in (None, '') for cell in row):
+                yield line, [row[i] if i < len(row) else None for i in positions]
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, filename):
+    """(line number, [values in COLUMNS order]) for every non-empty data row."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return _csv_rows(stream)
+    if extension == 'xlsx':
+        return _xlsx_rows(stream)
+    raise ImportFileError("Upload a .csv or .xlsx file")
+
+
+def clean_row(values):
+    """The row as a dict of Student fields; raises ValueError naming the first problem."""
+    row = {}
+    for column, value in zip(COLUMNS, values):
+        if isinstance(value, float) and value.is_integer():
+            # Numeric IDs come back from spreadsheets as floats
+            value = int(value)
+        value = '' if value is None else str(value)
+        row[column] = value if column == 'password' else value.strip()
+        if not row[column]:
+            raise ValueError(f"{column} is empty")
+        if len(row[column]) > MAX_LENGTHS.get(column, len(row[column])):
+            raise ValueError(f"{column} is longer than {MAX_LENGTHS[column]} characters")
+    row['email'] = row['email'].lower()
+    row['gender'] = row['gender'].lower()
+    if not EMAIL.match(row['email']):
+        raise ValueError(f"{row['email']} is not an email address")
+    if row['gender'] not in GENDERS:
+        raise ValueError(f"gender must be one of {', '.join(GENDERS)}")
+    return row
@@ -0,0 +1,154 @@
+"""Fixtures: apps built by create_app() on a throwaway database.
+
+The database is a SQLite file per test unless TEST_DATABASE_URL points at
+a PostgreSQL database, which the tests then create their tables in and drop
+them from again. Attendance is partitioned exactly when that is PostgreSQL.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+# Decided when the models are declared, so before app is imported
+os.environ['ATTENDANCE_PARTITIONED'] = str(bool(TEST_DATABASE_URL)
+                                           and TEST_DATABASE_URL.startswith('postgresql')).lower()
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import app as attendance_app
+from app import Attendance, Student, db
+
+PASSWORD = 'secret'
+
+
+def app_config(tmp_path, **overrides):
+    return {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': TEST_DATABASE_URL or f"sqlite:///{tmp_path / 'attendance.db'}",
+        'SESSION_STORE_URL': f"sqlite:///{tmp_path / 'sessions.db'}",
+        'EXPORT_JOBS_DIR': str(tmp_path / 'exports'),
+        'BCRYPT_LOG_ROUNDS': 4,
+        'PASSWORD_HASH_WORKERS': 0,
+        'KIOSK_API_KEY': 'kiosk-key',
+        'LOG_LEVEL': 'WARNING',
+        'WARM_UP': False,
+        **overrides,
+    }
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Overrides for the app fixture; tests change it before asking for app."""
+    return app_config(tmp_path)
+
+
+@pytest.fixture
+def app(config):
+    app = attendance_app.create_app(config)
+    # The primary's tables only: a replica bind, where a test adds one, has no
+    # tables of its own, and its key stays in db.metadatas for later apps
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all(bind_key=None)
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin'] = True
+    return client
+
+
+@pytest.fixture
+def make_student(app):
+    """make_student(number, **columns) adds a confirmed student and returns its id."""
+    def make(number, **columns):
+        with app.app_context():
+            student = Student(**{
+                'student_id': f"S{number:05d}",
+                'name': f"Student {number}",
+                'course': 'Computing',
+                'email': f"student{number}@example.com",
+                'password': attendance_app.password_hasher.hash(PASSWORD),
+                'gender': 'F',
+                'confirmed': True,
+                'confirmation_date': datetime.now(),
+                **columns,
+            })
+            db.session.add(student)
+            db.session.commit()
+            return student.id
+    return make
+
+
+def login(client, number):
+    response = client.post('/login', data={'role': 'student', 'password': PASSWORD,
+                                           'username': f"student{number}@example.com"})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@pytest.fixture
+def queries():
+    """SQL statements executed from here on, by any engine, as a list of strings."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(Engine, 'before_cursor_execute', record)
+
+
+def seed_attendance(app, students, days, first=0, courses=('Computing', 'Biology')):
+    """Confirmed students numbered from first, each present on the days weekdays up to today.
+
+    Written with bulk inserts and rolled up in one pass; returns the student ids.
+    """
+    today = date.today()
+    weekdays = []
+    day = today
+    while len(weekdays) < days:
+        if day.weekday() < 5:
+            weekdays.append(day)
+        day -= timedelta(days=1)
+    with app.app_context():
+        password = attendance_app.password_hasher.hash(PASSWORD)
+        db.session.execute(Student.__table__.insert(), [
+            {'student_id': f"S{number:05d}", 'name': f"Student {number}",
+             'course': courses[number % len(courses)], 'email': f"student{number}@example.com",
+             'password': password, 'gender': 'F', 'confirmed': True,
+             'confirmation_date': datetime.now() - timedelta(days=400),
+             'registration_date': datetime.now() - timedelta(days=400)}
+            for number in range(first, first + students)
+        ])
+        ids = [pk for (pk,) in db.session.query(Student.id)
+               .filter(Student.student_id.in_([f"S{n:05d}" for n in range(first, first + students)]))]
+        inserted = db.session.execute(Attendance.__table__.insert().returning(Attendance.id), [
+            {'student_id': pk, 'date': day, 'time': time(8, pk % 30), 'time_in': time(8, pk % 30),
+             'time_out': time(16, 0), 'status': 'Present'}
+            for pk in ids for day in weekdays
+        ]).scalars().all()
+        attendance_app.update_rollups(Attendance.id.in_(inserted))
+        db.session.commit()
+        attendance_app.invalidate_students()
+    return ids
@@ -0,0 +1,24 @@
+"""The cache backend has to be shared once more than one worker serves the app."""
+import pytest
+
+import app as attendance_app
+
+
+def test_memory_cache_is_refused_with_several_workers(config):
+    with pytest.raises(ValueError, match='CACHE_URL'):
+        attendance_app.create_app({**config, 'WEB_WORKERS': 4, 'CACHE_URL': 'memory://'})
+
+
+def test_redis_cache_is_accepted_with_several_workers(config):
+    pytest.importorskip('redis')
+    # The client connects lazily, so no server is needed to build the app
+    app = attendance_app.create_app({**config, 'WEB_WORKERS': 4,
+                                     'CACHE_URL': 'redis://localhost:6379/0'})
+    assert type(app.extensions['attendance']['cache'].backend).__name__ == 'RedisBackend'
+
+
+def test_invalidate_drops_cached_entries(app):
+    cache = app.extensions['attendance']['cache']
+    assert cache.get_or_set('students', 'counts', lambda: 1) == 1
+    cache.invalidate('students')
+    assert cache.get_or_set('students', 'counts', lambda: 2) == 2
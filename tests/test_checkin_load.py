@@ -0,0 +1,72 @@
+"""Morning rush: many students checking in at once, each tapping more than once.
+
+Every student ends up with exactly one attendance row for the day and one
+count in the rollups, and the slowest check-ins stay within a latency budget.
+CHECKIN_LOAD_STUDENTS, CHECKIN_LOAD_REPEATS and CHECKIN_LOAD_THREADS scale
+the rush (to thousands of requests against PostgreSQL in CI); the budget is
+CHECKIN_P99_BUDGET_MS, loose by default for a shared SQLite file.
+
+The budget is a fixed ceiling, not a comparison: the old read-then-insert
+path is gone, so this does not show the single-statement upsert to be
+faster than it, only that check-ins stay correct and within the budget.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import func
+
+from app import Attendance, CourseAttendanceRollup, db
+from conftest import seed_attendance
+
+STUDENTS = int(os.getenv('CHECKIN_LOAD_STUDENTS', 200))
+REPEATS = int(os.getenv('CHECKIN_LOAD_REPEATS', 3))
+THREADS = int(os.getenv('CHECKIN_LOAD_THREADS', 8))
+P99_BUDGET_MS = float(os.getenv('CHECKIN_P99_BUDGET_MS', 1000))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def test_concurrent_checkins_record_one_row_per_student(app):
+    # Students with no attendance yet; seeding gives them past days only
+    ids = seed_attendance(app, students=STUDENTS, days=1)
+    with app.app_context():
+        db.session.query(Attendance).delete()
+        db.session.query(CourseAttendanceRollup).delete()
+        db.session.commit()
+
+    clients = {}
+    for pk in ids:
+        clients[pk] = client = app.test_client()
+        with client.session_transaction() as session:
+            session['student_id'] = pk
+
+    def check_in(pk):
+        started = time.perf_counter()
+        response = clients[pk].get('/mark_attendance')
+        return response.status_code, time.perf_counter() - started
+
+    # Every student's taps are spread across the rush, not sent back to back
+    attempts = [pk for _ in range(REPEATS) for pk in ids]
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(check_in, attempts))
+
+    assert {status for status, _ in results} == {302}
+    with app.app_context():
+        per_student = dict(db.session.query(Attendance.student_id, func.count())
+                           .filter(Attendance.date == date.today())
+                           .group_by(Attendance.student_id))
+        present = (db.session.query(func.sum(CourseAttendanceRollup.present))
+                   .filter(CourseAttendanceRollup.grain == 'day',
+                           CourseAttendanceRollup.period_start == date.today())
+                   .scalar())
+    assert per_student == {pk: 1 for pk in ids}
+    assert present == STUDENTS
+
+    # A fixed budget, see the module docstring
+    p99_ms = percentile([seconds for _, seconds in results], 0.99) * 1000
+    assert p99_ms < P99_BUDGET_MS, f"p99 {p99_ms:.0f} ms over {len(results)} check-ins"
@@ -0,0 +1,85 @@
+"""The check-in journal: lazily opened, one writer, bad entries set aside."""
+import os
+from datetime import datetime
+
+import pytest
+
+import app as attendance_app
+from app import Attendance
+from checkin_queue import CheckinJournal
+
+
+class Rejected(Exception):
+    pass
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CheckinJournal(str(tmp_path / 'checkins.db'), batch_size=8, permanent=(Rejected,))
+    yield journal
+    journal.stop()
+
+
+def fill(journal, *student_ids):
+    for student_id in student_ids:
+        journal.append(student_id, datetime(2026, 10, 1, 8, student_id))
+
+
+def test_nothing_is_opened_until_first_use(tmp_path):
+    CheckinJournal(str(tmp_path / 'checkins.db'))
+    assert os.listdir(tmp_path) == []
+
+
+def test_bad_entries_are_dead_lettered_and_the_rest_written(journal):
+    fill(journal, *range(1, 21))
+    written = []
+
+    def writer(batch):
+        if any(student_id in (5, 13) for _, student_id, _, _ in batch):
+            raise Rejected("student is gone")
+        written.extend(student_id for _, student_id, _, _ in batch)
+
+    assert journal.drain(writer) == 18
+    assert sorted(written) == [n for n in range(1, 21) if n not in (5, 13)]
+    assert journal.pending() == []
+    assert [(student_id, error) for _, student_id, _, _, error, _ in journal.dead()] == [
+        (5, "student is gone"), (13, "student is gone")]
+
+    assert journal.requeue() == 2
+    assert [student_id for _, student_id, _, _ in journal.pending()] == [5, 13]
+
+
+def test_other_failures_leave_the_batch_queued(journal):
+    fill(journal, 1, 2, 3)
+
+    def writer(batch):
+        raise ConnectionError("database is down")
+
+    with pytest.raises(ConnectionError):
+        journal.drain(writer)
+    assert len(journal.pending()) == 3
+    assert journal.dead() == []
+
+
+def test_only_one_journal_writes(journal):
+    other = CheckinJournal(journal.path)
+    try:
+        assert journal._lead()
+        assert not other._lead()
+        journal.stop()
+        assert other._lead()
+    finally:
+        other.stop()
+
+
+def test_queued_checkins_reach_the_database(app, make_student, tmp_path):
+    student = make_student(1)
+    queue = app.extensions['attendance']['checkin_queue'] = CheckinJournal(
+        str(tmp_path / 'checkins.db'), permanent=attendance_app.CHECKIN_REJECTED)
+    now = datetime.now()
+    queue.append(student, now)
+    queue.append(student, now.replace(hour=23, minute=59), 'time_out')
+    assert queue.drain(lambda batch: attendance_app.write_queued_checkins(app, batch)) == 2
+    with app.app_context():
+        [record] = Attendance.query.all()
+        assert (record.student_id, record.time_out) == (student, now.replace(hour=23, minute=59).time())
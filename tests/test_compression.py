@@ -0,0 +1,37 @@
+"""Streamed responses stay compressed: flushed per buffer, not per template piece."""
+import zlib
+
+from flask import Flask, Response, request
+
+from compression import Compressor
+
+ROW = '<tr><td>S{0:05d}</td><td>Student {0}</td><td>Computing</td><td>08:00:00</td></tr>\n'
+
+
+def compressed(response_factory):
+    app = Flask(__name__)
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = Compressor()(request, response_factory())
+        return response, list(response.iter_encoded())
+
+
+def test_streamed_pages_compress_about_as_well_as_whole_ones():
+    rows = [ROW.format(number) for number in range(3000)]
+    response, pieces = compressed(lambda: Response(iter(rows), mimetype='text/html'))
+    body = b''.join(pieces)
+    whole = zlib.compress(''.join(rows).encode(), 6)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(body, 16 + zlib.MAX_WBITS).decode() == ''.join(rows)
+    assert len(body) < 2 * len(whole)
+    assert 1 < len(pieces) < len(rows) / 10
+
+
+def test_event_streams_are_flushed_per_event():
+    events = [f"data: {number}\n\n" for number in range(200)]
+    response, pieces = compressed(lambda: Response(iter(events), mimetype='text/event-stream'))
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Every event can be read as soon as its piece arrives
+    for event, piece in zip(events, pieces):
+        assert decompressor.decompress(piece).decode() == event
@@ -0,0 +1,51 @@
+"""Background export jobs read from the same database as the watermark that keys them."""
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import db
+from conftest import app_config, seed_attendance
+
+
+@pytest.fixture
+def config(tmp_path):
+    # The "replica" is the same SQLite file behind its own engine
+    config = app_config(tmp_path)
+    return {**config, 'REPLICA_DATABASE_URL': config['SQLALCHEMY_DATABASE_URI']}
+
+
+def finished(app, job_id, timeout=10):
+    jobs = app.extensions['attendance']['export_jobs']
+    deadline = time.monotonic() + timeout
+    while (job := jobs.get(job_id)).status in ('queued', 'running'):
+        assert time.monotonic() < deadline, "export job did not finish"
+        time.sleep(0.05)
+    return job
+
+
+def test_export_jobs_build_from_the_replica(app, admin_client):
+    seed_attendance(app, students=5, days=3)
+    with app.app_context():
+        replica = db.engines['replica']
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'attendance' in statement:
+            selects.append((conn.engine is replica, statement))
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        response = admin_client.get('/export/records/monthly', query_string={
+            'date': date.today().isoformat(), 'format': 'csv'})
+        assert response.status_code == 302
+        job = finished(app, response.headers['Location'].rstrip('/').split('/')[-1])
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+    assert job.status == 'done', job.error
+    # The watermark during the request, then the export itself in the job's thread
+    assert len(selects) >= 2
+    assert all(on_replica for on_replica, _ in selects), [sql for on, sql in selects if not on]
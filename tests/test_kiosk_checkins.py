@@ -0,0 +1,85 @@
+"""The kiosk bulk API validates each scan on its own and records the rest."""
+from datetime import datetime, time, timedelta
+
+import app as attendance_app
+from app import Attendance, StudentAttendanceRollup
+
+
+def post(client, events):
+    response = client.post('/api/attendance/bulk', json={'events': events},
+                           headers={'X-API-Key': 'kiosk-key'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_scans_outside_the_window_are_rejected_per_item(app, client, make_student):
+    make_student(1)
+    now = datetime.now()
+    scan = lambda when: {'student_id': 'S00001', 'timestamp': when.isoformat()}
+    body = post(client, [
+        scan(now),
+        scan(now + timedelta(days=1)),
+        scan(now - timedelta(days=attendance_app.CHECKIN_MAX_AGE_DAYS + 1)),
+        scan(now - timedelta(days=attendance_app.CHECKIN_MAX_AGE_DAYS)),
+        {'student_id': 'S00001', 'timestamp': 'yesterday'},
+    ])
+
+    assert body['recorded'] == 2
+    assert [(item['status'], item.get('error')) for item in body['results']] == [
+        ('recorded', None),
+        ('error', "timestamp is in the future"),
+        ('error', f"timestamp is more than {attendance_app.CHECKIN_MAX_AGE_DAYS} days old"),
+        ('recorded', None),
+        ('error', "timestamp must be an ISO 8601 datetime"),
+    ]
+    with app.app_context():
+        assert Attendance.query.count() == 2
+
+
+def test_small_clock_skew_is_accepted(client, make_student):
+    make_student(1)
+    ahead = datetime.now() + timedelta(seconds=attendance_app.CHECKIN_MAX_SKEW_SECONDS // 2)
+    body = post(client, [{'student_id': 'S00001', 'timestamp': ahead.isoformat()}])
+    assert body['results'][0]['status'] == 'recorded'
+
+
+def scans(*events):
+    # Yesterday's, so none of the times is in the future
+    day = datetime.now().date() - timedelta(days=1)
+    return [{'student_id': 'S00001', 'type': kind,
+             'timestamp': datetime.combine(day, time.fromisoformat(at)).isoformat()}
+            for kind, at in events]
+
+
+def stored(app):
+    with app.app_context():
+        [row] = Attendance.query.all()
+        [rollup] = StudentAttendanceRollup.query.filter_by(grain='day').all()
+        return (row.time_in, row.time_out), (rollup.present, rollup.last_time_out)
+
+
+def statuses(body):
+    return [(item['status'], item.get('error')) for item in body['results']]
+
+
+def test_scans_arriving_out_of_order_across_batches(app, client, make_student):
+    make_student(1)
+    assert statuses(post(client, scans(('time_out', '15:00')))) == [
+        ('error', "No check-in for that day to check out from")]
+    assert statuses(post(client, scans(('time_in', '08:00')))) == [('recorded', None)]
+    assert statuses(post(client, scans(('time_out', '12:00')))) == [('recorded', None)]
+    # A back-dated check-out leaves the later one alone; an earlier check-in moves time_in
+    assert statuses(post(client, scans(('time_out', '11:00')))) == [('duplicate', None)]
+    assert statuses(post(client, scans(('time_in', '07:30')))) == [('recorded', None)]
+
+    assert stored(app) == ((time(7, 30), time(12)), (1, time(12)))
+
+
+def test_out_of_order_batch_and_its_replay(app, client, make_student):
+    make_student(1)
+    batch = scans(('time_out', '16:00'), ('time_in', '08:15'), ('time_out', '12:00'),
+                  ('time_in', '08:00'))
+    assert [item['status'] for item in post(client, batch)['results']] == ['recorded'] * 4
+    assert [item['status'] for item in post(client, batch)['results']] == ['duplicate'] * 4
+
+    assert stored(app) == ((time(8), time(16)), (1, time(16)))
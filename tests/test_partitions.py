@@ -0,0 +1,28 @@
+"""Monthly attendance partitions and the DEFAULT partition behind them (PostgreSQL only)."""
+from datetime import date, time
+
+import pytest
+
+import app as attendance_app
+from app import Attendance, db
+from partitions import DEFAULT_PARTITION, add_months, create_partitions, existing_partitions
+
+pytestmark = pytest.mark.skipif(not attendance_app.ATTENDANCE_PARTITIONED,
+                                reason='attendance is only partitioned on PostgreSQL')
+
+
+def test_back_dated_rows_wait_in_the_default_partition(app, make_student):
+    student = make_student(1)
+    month = add_months(date.today().replace(day=1), -14)
+    with app.app_context():
+        assert month not in existing_partitions(db.session.connection())
+        db.session.add(Attendance(student_id=student, date=month, time=time(8), time_in=time(8),
+                                  status='Present'))
+        db.session.commit()
+        count = f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}"
+        assert db.session.execute(db.text(count)).scalar() == 1
+
+        with db.engine.begin() as connection:
+            create_partitions(connection, month, month)
+        assert db.session.execute(db.text(count)).scalar() == 0
+        assert Attendance.query.filter_by(student_id=student, date=month).count() == 1
@@ -0,0 +1,72 @@
+"""Password hashing pool and login throttling limits."""
+import time
+
+import pytest
+
+import passwords
+from passwords import LoginThrottle, PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(passwords.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_throttle_blocks_after_max_failures(clock):
+    throttle = LoginThrottle(max_failures=3, window=60)
+    for _ in range(3):
+        assert not throttle.blocked('ip|user')
+        throttle.failed('ip|user')
+    assert throttle.blocked('ip|user')
+    clock[0] += 61
+    assert not throttle.blocked('ip|user')
+
+
+def test_throttle_forgets_expired_keys_without_rechecking_them(clock):
+    throttle = LoginThrottle(max_failures=5, window=60)
+    for number in range(1000):
+        throttle.failed(f"ip|user{number}")
+    clock[0] += 61
+    throttle.failed('ip|someone-else')
+    assert len(throttle) == 1
+
+
+def test_throttle_holds_at_most_max_keys(clock):
+    throttle = LoginThrottle(max_failures=5, window=60, max_keys=100)
+    for number in range(1000):
+        throttle.failed(f"ip|user{number}")
+        clock[0] += 0.001
+    assert len(throttle) == 100
+    # The most recent failures are the ones kept
+    assert throttle._failures.get('ip|user999')
+    assert not throttle._failures.get('ip|user0')
+
+
+def test_full_hashing_queue_fails_fast():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1, wait=0.05)
+    hasher._slots.acquire()
+    try:
+        started = time.perf_counter()
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('secret')
+        assert time.perf_counter() - started < 1
+    finally:
+        hasher._slots.release()
+
+
+def test_bulk_hashes_on_the_shared_pool():
+    hasher = PasswordHasher(rounds=4, workers=2)
+    try:
+        with hasher.bulk(chunk_size=3) as hash_many:
+            hashes = hash_many(f"password{number}" for number in range(10))
+        pool = hasher._pool
+        assert pool is not None
+        assert hasher.check(hashes[7], 'password7')
+        assert hasher._pool is pool
+        assert len(hashes) == 10
+        assert all(passwords._check(hashed, f"password{number}")
+                   for number, hashed in enumerate(hashes))
+    finally:
+        hasher.shutdown()
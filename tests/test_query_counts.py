@@ -0,0 +1,104 @@
+"""SQL statements per view: a fixed number, however many rows are shown or exported.
+
+Each view is measured on a small data set and again after ten times as many
+students have attended, so a query issued per row (a lazy Student load, a
+per-record lookup) shows up as a changed count. The app's own SQL_QUERY_BUDGET
+is set as well, which fails any request of the suite that goes over it.
+"""
+import re
+from datetime import date
+
+import pytest
+
+import app as attendance_app
+from conftest import app_config, seed_attendance
+
+PER_PAGE = 100
+
+# Statements per view, including the session and cache bookkeeping around it
+BUDGETS = {
+    'admin_records': 6,
+    'records_export': 2,
+    'history_export': 2,
+    'summary_export': 2,
+}
+
+
+@pytest.fixture
+def config(tmp_path):
+    return app_config(tmp_path, SQL_QUERY_BUDGET=max(BUDGETS.values()))
+
+
+def count(queries, run):
+    del queries[:]
+    run()
+    return len(queries)
+
+
+def grow(app, queries, measure):
+    """measure()'s statement count with 20 students, then with 200."""
+    seed_attendance(app, students=20, days=5)
+    small = count(queries, measure)
+    seed_attendance(app, students=180, days=5, first=20)
+    large = count(queries, measure)
+    return small, large
+
+
+def records_page(admin_client):
+    def get():
+        # A new filter each time, so the rendered tables are never served from the cache
+        get.calls += 1
+        response = admin_client.get('/admin/records', query_string={
+            'period': 'monthly', 'date': date.today().isoformat(), 'per_page': PER_PAGE,
+            'call': get.calls})
+        assert response.status_code == 200
+        get.rows = len(re.findall(rb'<td>S\d{5}</td>', response.data))
+    get.calls = 0
+    return get
+
+
+def export(app, build, *params):
+    def run():
+        with app.app_context():
+            header, rows = build(*params)
+            assert sum(1 for _ in rows)
+    return run
+
+
+def test_admin_records_queries_do_not_grow_with_rows(app, admin_client, queries):
+    get = records_page(admin_client)
+    small, large = grow(app, queries, get)
+    # 200 students have attended this month, so the page is full
+    assert get.rows == PER_PAGE
+    assert small == large
+    assert large <= BUDGETS['admin_records']
+
+
+def test_records_export_queries_do_not_grow_with_rows(app, queries):
+    today = date.today()
+    small, large = grow(app, queries, export(app, attendance_app.records_export,
+                                             today.replace(day=1), today))
+    assert small == large
+    assert large <= BUDGETS['records_export']
+
+
+def test_history_export_queries_do_not_grow_with_rows(app, queries):
+    small, large = grow(app, queries, export(app, attendance_app.history_export))
+    assert small == large
+    assert large <= BUDGETS['history_export']
+
+
+def test_summary_export_queries_do_not_grow_with_rows(app, queries):
+    today = date.today()
+    small, large = grow(app, queries, export(app, attendance_app.summary_export,
+                                             'monthly', today.replace(day=1), today))
+    assert small == large
+    assert large <= BUDGETS['summary_export']
+
+
+def test_export_requests_stay_within_budget(app, admin_client, queries):
+    seed_attendance(app, students=50, days=5)
+    for url in ('/export/records/monthly', '/export/summary/monthly', '/download_attendance'):
+        response = admin_client.get(url, query_string={'date': date.today().isoformat(),
+                                                       'format': 'csv'})
+        assert response.status_code == 302, url
@@ -0,0 +1,83 @@
+"""The hot attendance and student queries are served by their indexes.
+
+Each test asks the planner how it would run the query the view issues. On
+SQLite that is EXPLAIN QUERY PLAN, which must name the index; on PostgreSQL
+(TEST_DATABASE_URL) sequential scans are priced out for the transaction,
+so any Seq Scan left in the plan means no index can serve the query.
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import app as attendance_app
+from app import Attendance, Student, db
+from conftest import seed_attendance
+
+
+@pytest.fixture
+def explain(app):
+    seed_attendance(app, students=30, days=10)
+    with app.app_context():
+        yield plan
+        db.session.rollback()
+
+
+def plan(query):
+    """The plan of query as one string."""
+    statement = getattr(query, 'statement', query)
+    sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        rows = db.session.execute(text(f'EXPLAIN {sql}'))
+        return '\n'.join(row[0] for row in rows)
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))
+    return '\n'.join(row[-1] for row in rows)
+
+
+def assert_uses(query_plan, sqlite_index):
+    if db.engine.dialect.name == 'postgresql':
+        assert 'Seq Scan' not in query_plan, query_plan
+    else:
+        assert f'INDEX {sqlite_index}' in query_plan, query_plan
+
+
+def test_checkin_lookup_uses_student_date_unique_index(explain):
+    query = db.session.query(Attendance.id).filter(Attendance.student_id == 7,
+                                                   Attendance.date == date.today())
+    # SQLite names the index behind UNIQUE constraints itself
+    assert_uses(explain(query), 'sqlite_autoindex_attendance_1')
+
+
+def test_daily_roster_joins_through_student_date_index(explain):
+    assert_uses(explain(attendance_app.daily_roster(date.today())), 'sqlite_autoindex_attendance_1')
+
+
+def test_records_range_uses_date_index(explain):
+    today = date.today()
+    query = (attendance_app.attendance_with_students()
+             .filter(Attendance.date.between(today - timedelta(days=30), today))
+             .order_by(Attendance.date.desc(), Attendance.id.desc())
+             .limit(50))
+    assert_uses(explain(query), 'ix_attendance_date_id')
+
+
+def test_pending_students_use_confirmed_index(explain):
+    query = db.session.query(Student.id).filter(Student.confirmed == False)
+    assert_uses(explain(query), 'ix_student_confirmed')
+
+
+def test_student_pages_use_registration_date_index(explain):
+    query = (db.session.query(*attendance_app.STUDENT_LIST_COLUMNS)
+             .order_by(Student.registration_date.desc(), Student.id.desc())
+             .limit(50))
+    assert_uses(explain(query), 'ix_student_registration_date_id')
+
+
+def test_student_search_uses_search_index(explain):
+    if db.engine.dialect.name != 'postgresql':
+        pytest.skip('full-text search index is PostgreSQL only')
+    query, ordering = attendance_app.student_search(
+        db.session.query(*attendance_app.STUDENT_LIST_COLUMNS), 'student 1')
+    query_plan = explain(query.order_by(*ordering).limit(10))
+    assert 'ix_student_search' in query_plan, query_plan
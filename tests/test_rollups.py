@@ -0,0 +1,151 @@
+"""Attendance rollups: sharded course counts, derived absences, lock order."""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+import app as attendance_app
+from app import Attendance, CourseAttendanceRollup, StudentAttendanceRollup, db
+from conftest import seed_attendance
+
+
+def last_week():
+    monday = date.today() - timedelta(days=date.today().weekday() + 7)
+    return monday, monday + timedelta(days=4)
+
+
+def attend(app, student_id, *days):
+    with app.app_context():
+        inserted = [Attendance(student_id=student_id, date=day, time=time(8), time_in=time(8),
+                               status='Present') for day in days]
+        db.session.add_all(inserted)
+        db.session.flush()
+        attendance_app.update_rollups(Attendance.id.in_([row.id for row in inserted]))
+        db.session.commit()
+
+
+def test_course_counts_are_sharded_by_student_and_summed(app, make_student):
+    monday, friday = last_week()
+    joined = datetime.combine(monday - timedelta(days=30), time())
+    ids = [make_student(number, confirmation_date=joined) for number in range(4)]
+    for pk in ids:
+        attend(app, pk, monday)
+
+    with app.app_context():
+        shards = {shard for (shard,) in db.session.query(CourseAttendanceRollup.shard)
+                  .filter(CourseAttendanceRollup.grain == 'day')}
+        assert shards == {pk % attendance_app.ROLLUP_SHARDS for pk in ids}
+        [row] = attendance_app.course_summary('weekly', monday, friday)
+        assert (row['course'], row['present']) == ('Computing', 4)
+        assert attendance_app.rollup_mismatches(monday, friday) == []
+
+
+def test_absences_are_school_days_not_attended(app, make_student):
+    monday, friday = last_week()
+    joined = datetime.combine(monday - timedelta(days=30), time())
+    regular = make_student(1, confirmation_date=joined)
+    make_student(2, confirmation_date=joined)
+    # Joined on the Wednesday, so only three of the week's days count
+    late_joiner = make_student(3, confirmation_date=datetime.combine(monday + timedelta(days=2), time()))
+    attend(app, regular, monday, monday + timedelta(days=1))
+    attend(app, late_joiner, friday)
+
+    with app.app_context():
+        [row] = attendance_app.course_summary('weekly', monday, friday)
+        assert (row['present'], row['absent']) == (3, 3 + 5 + 2)
+
+        header, rows = attendance_app.summary_export('weekly', monday, friday)
+        absent = {row[0]: row[header.index('Absent')] for row in rows}
+        assert absent == {'S00001': 3, 'S00002': 5, 'S00003': 2}
+
+
+def test_rollup_rows_are_written_in_key_order(app, monkeypatch):
+    batches = []
+    execute = db.session.execute
+
+    def record(statement, params=None, *args, **kwargs):
+        if isinstance(params, list):
+            batches.append(params)
+        return execute(statement, params, *args, **kwargs)
+
+    day = date.today()
+    rows = [(pk, course, day, 'Present', time(8), None)
+            for pk, course in ((9, 'Maths'), (3, 'Biology'), (17, 'Art'), (1, 'Maths'))]
+    with app.app_context():
+        monkeypatch.setattr(db.session, 'execute', record)
+        attendance_app.apply_rollup_deltas(attendance_app.rollup_deltas(rows))
+        db.session.rollback()
+
+    assert len(batches) == 2
+    for model, params in zip((StudentAttendanceRollup, CourseAttendanceRollup), batches):
+        keys = [tuple(row[name] for name in model.key_columns) for row in params]
+        assert keys == sorted(keys)
+
+
+def test_bulk_delete_subtracts_grouped_counts(app, admin_client, queries):
+    ids = seed_attendance(app, students=40, days=10)
+    start = date.today() - timedelta(days=30)
+    del queries[:]
+    response = admin_client.post('/admin/students/bulk', data={
+        'action': 'delete', 'student_ids': ids[::2]})
+    assert response.status_code == 302
+
+    # One row per course shard, day and status rather than per attendance row
+    [removals] = [sql for sql in queries if 'GROUP BY' in sql]
+    assert 'count(' in removals.lower()
+    with app.app_context():
+        assert Attendance.query.count() == 20 * 10
+        totals = {row['course']: row['present']
+                  for row in attendance_app.course_summary('custom', start, date.today())}
+        assert sum(totals.values()) == 20 * 10
+        assert attendance_app.rollup_mismatches(start, date.today()) == []
+
+
+def test_watermark_moves_when_a_check_out_is_rewritten(app, make_student):
+    today = date.today()
+    first, second = make_student(1), make_student(2)
+
+    def check(pk, hour, kind='time_out'):
+        with app.app_context():
+            attendance_app.write_checkins({0: (pk, datetime.combine(today, time(hour)), kind)})
+            db.session.commit()
+            return attendance_app.data_watermark(today, today)
+
+    check(first, 8, 'time_in')
+    check(second, 8, 'time_in')
+    after_first = check(first, 16)
+    # Earlier than the day's last check-out, so no count, time or id changes
+    assert check(second, 15) != after_first
+
+
+@pytest.fixture
+def archive(config, tmp_path):
+    pytest.importorskip('pyarrow')
+    config['ATTENDANCE_ARCHIVE_DIR'] = str(tmp_path / 'archive')
+
+
+@pytest.mark.parametrize('delete', [
+    lambda client, pk: client.post(f'/confirm_delete_student/{pk}'),
+    lambda client, pk: client.get(f'/delete_student/{pk}'),
+], ids=['confirm_delete_student', 'delete_student'])
+def test_deleting_a_student_removes_their_archived_attendance(archive, app, admin_client,
+                                                              make_student, delete):
+    monday, friday = last_week()
+    kept, deleted = make_student(1), make_student(2)
+    attend(app, kept, monday)
+    attend(app, deleted, monday, friday)
+    result = app.test_cli_runner().invoke(
+        args=['archive-attendance', '--before', (friday + timedelta(days=1)).isoformat()])
+    assert 'Archived 3' in result.output
+
+    assert delete(admin_client, deleted).status_code == 302
+
+    with app.app_context():
+        assert not StudentAttendanceRollup.query.filter_by(student_id=deleted).count()
+        [row] = attendance_app.course_summary('weekly', monday, friday)
+        assert row['present'] == 1
+        assert attendance_app.rollup_mismatches(monday, friday) == []
+        header, rows = attendance_app.records_export(monday, friday)
+        assert [row[1] for row in rows] == ['S00001']
+    response = admin_client.get('/admin/records', query_string={'period': 'weekly',
+                                                           'date': monday.isoformat()})
+    assert b'S00001' in response.data and b'S00002' not in response.data
@@ -0,0 +1,119 @@
+"""Worker startup: what importing the app costs and does, and first-request latency.
+
+Measured in a fresh interpreter, as a newly forked or started worker is, so
+nothing is cached but the bytecode. The time budgets are loose enough for a
+slow CI machine; STARTUP_IMPORT_BUDGET_MS, STARTUP_CREATE_APP_BUDGET_MS and
+STARTUP_FIRST_REQUEST_BUDGET_MS tighten them.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+# Imported by the features that need them, never by `import app`
+HEAVY_MODULES = ('openpyxl', 'numpy', 'pandas', 'pyarrow', 'alembic')
+
+BUDGETS_MS = {
+    'import': float(os.getenv('STARTUP_IMPORT_BUDGET_MS', 3000)),
+    'create_app': float(os.getenv('STARTUP_CREATE_APP_BUDGET_MS', 3000)),
+    'first_request': float(os.getenv('STARTUP_FIRST_REQUEST_BUDGET_MS', 1000)),
+}
+
+# Runs in the child interpreter and prints one JSON line
+CHILD = """
+import json, logging, os, sys, time
+workdir, heavy = sys.argv[1], sys.argv[2].split(',')
+root_handlers = list(logging.getLogger().handlers)
+started = time.perf_counter()
+import app as attendance_app
+imported = time.perf_counter()
+import_side_effects = {'files': sorted(os.listdir(workdir)),
+                       'root_handlers_changed': logging.getLogger().handlers != root_handlers}
+app = attendance_app.create_app({'WARM_UP': False})
+attendance_app.warm_up(app)
+ready = time.perf_counter()
+with app.app_context():
+    attendance_app.db.create_all()
+client = app.test_client()
+latencies = []
+for _ in range(2):
+    request_started = time.perf_counter()
+    status = client.get('/login').status_code
+    latencies.append(time.perf_counter() - request_started)
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (ready - imported) * 1000,
+    'first_request_ms': latencies[0] * 1000,
+    'second_request_ms': latencies[1] * 1000,
+    'status': status,
+    'import_side_effects': import_side_effects,
+    'heavy_modules': sorted(set(heavy) & set(sys.modules)),
+    'templates': len(app.jinja_env.cache or ()),
+}))
+"""
+
+
+@pytest.fixture(scope='module')
+def startup(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp('startup')
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join([ROOT, os.path.join(ROOT, 'tests')]),
+        'DATABASE_URL': f"sqlite:///{workdir / 'attendance.db'}",
+        'ATTENDANCE_PARTITIONED': 'false',
+        'SESSION_STORE_URL': f"sqlite:///{workdir / 'sessions.db'}",
+        'EXPORT_JOBS_DIR': str(workdir / 'exports'),
+        'LOG_LEVEL': 'WARNING',
+    }
+    output = subprocess.check_output(
+        [sys.executable, '-c', CHILD, str(workdir), ','.join(HEAVY_MODULES)],
+        cwd=str(workdir), env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_leaves_heavy_modules_alone(startup):
+    assert startup['heavy_modules'] == []
+
+
+def test_import_has_no_side_effects(startup):
+    # No session store, export directory or database opened, no logging reconfigured
+    assert startup['import_side_effects'] == {'files': [], 'root_handlers_changed': False}
+
+
+def test_warm_up_compiles_every_template(startup):
+    templates = [name for name in os.listdir(ROOT) if name.endswith('.html')]
+    assert startup['templates'] == len(templates)
+
+
+def test_startup_within_budget(startup):
+    assert startup['status'] == 200
+    for metric, budget in BUDGETS_MS.items():
+        assert startup[f'{metric}_ms'] < budget, (metric, startup)
+
+
+def test_create_app_builds_independent_apps(app, config):
+    import app as attendance_app
+
+    other = attendance_app.create_app(config)
+    assert other is not app
+    assert other.extensions['attendance']['cache'] is not app.extensions['attendance']['cache']
+    assert other.session_interface.store is not app.session_interface.store
+
+
+def test_create_app_leaves_root_logging_alone(config):
+    import logging
+
+    import app as attendance_app
+
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    attendance_app.create_app(config)
+    attendance_app.create_app(config)
+    assert (root.handlers, root.level) == (handlers, level)
+    # Configured once however many apps are built, and only the app's loggers
+    assert len(logging.getLogger('attendance').handlers) == 1
+    assert not logging.getLogger('attendance').propagate
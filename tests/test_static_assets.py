@@ -0,0 +1,25 @@
+"""Static files are linked by content hash and cached for good under it."""
+from flask import url_for
+
+from static_assets import IMMUTABLE
+
+
+def test_pages_link_the_stylesheet_by_its_hash(app, admin_client):
+    with app.test_request_context():
+        url = url_for('static', filename='style.css')
+    assert url.startswith('/static/style.css?v=')
+
+    page = admin_client.get('/admin')
+    assert page.status_code == 200
+    assert url.encode() in page.data
+
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE
+
+
+def test_other_versions_are_not_immutable(client):
+    for url in ('/static/style.css', '/static/style.css?v=stale'):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
@@ -0,0 +1,52 @@
+"""Keyset pages of /admin/students: every student exactly once, in both directions."""
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import Student, db
+
+CURSOR = re.compile(r'\b(after|before)=([\w-]+)')
+
+
+def page(admin_client, **args):
+    response = admin_client.get('/admin/students', query_string={'per_page': 2, **args})
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    shown = re.findall(r'S\d{5}', body)
+    cursors = dict(CURSOR.findall(body))
+    return list(dict.fromkeys(shown)), cursors
+
+
+def test_pages_cover_every_student_once(app, admin_client, make_student):
+    # Three students share a registration time, so the id breaks the ties
+    same_time = datetime(2026, 9, 1, 8, 0)
+    for number in range(7):
+        make_student(number, registration_date=same_time if number < 3 else datetime(2026, 9, number))
+
+    seen, cursors, pages = [], {}, 0
+    while True:
+        shown, cursors = page(admin_client, **({'after': cursors['after']} if pages else {}))
+        seen += shown
+        pages += 1
+        if 'after' not in cursors:
+            break
+    assert pages == 4
+    assert sorted(seen) == [f"S{number:05d}" for number in range(7)]
+    assert len(seen) == len(set(seen))
+
+    # And back again from the last page
+    back = []
+    while 'before' in cursors:
+        shown, cursors = page(admin_client, before=cursors['before'])
+        back = shown + back
+    assert back == seen[:-1]
+
+
+def test_registration_date_defaults_and_is_required(app, make_student):
+    make_student(1)
+    with app.app_context():
+        assert db.session.query(Student.registration_date).scalar() is not None
+        with pytest.raises(IntegrityError):
+            db.session.execute(Student.__table__.update().values(registration_date=None))
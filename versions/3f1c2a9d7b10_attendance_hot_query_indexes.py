@@ -0,0 +1,71 @@
+"""Indexes for the attendance hot queries
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+The student and attendance tables were originally created with
+db.create_all(), so this is the first revision and assumes they exist.
+
+"""
+import logging
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+TRGM_COLUMNS = ('name', 'email', 'student_id', 'course')
+
+
+def upgrade():
+    # Keep the earliest check-in when a student was marked twice on one day,
+    # otherwise the unique constraint cannot be created. Every row removed is
+    # logged, so the operator can see what the old duplicate check let through.
+    duplicates = op.get_bind().exec_driver_sql(
+        "SELECT id, student_id, date, time, status FROM attendance WHERE id NOT IN "
+        "(SELECT MIN(id) FROM attendance GROUP BY student_id, date) ORDER BY student_id, date, id"
+    ).fetchall()
+    for row in duplicates:
+        log.warning("Deleting duplicate attendance id=%s student_id=%s date=%s time=%s status=%s",
+                    *row)
+    if duplicates:
+        op.execute(
+            "DELETE FROM attendance WHERE id NOT IN "
+            "(SELECT MIN(id) FROM attendance GROUP BY student_id, date)"
+        )
+        log.warning("Deleted %d duplicate attendance rows", len(duplicates))
+    with op.batch_alter_table('attendance') as batch_op:
+        batch_op.create_unique_constraint('uq_attendance_student_date', ['student_id', 'date'])
+    op.create_index('ix_attendance_date_id', 'attendance', ['date', 'id'])
+
+    op.create_index('ix_student_confirmed', 'student', ['confirmed'])
+    op.create_index('ix_student_registration_date_id', 'student', ['registration_date', 'id'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_student_{column}_trgm', 'student', [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'}
+            )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in TRGM_COLUMNS:
+            op.drop_index(f'ix_student_{column}_trgm', table_name='student')
+
+    op.drop_index('ix_student_registration_date_id', table_name='student')
+    op.drop_index('ix_student_confirmed', table_name='student')
+
+    op.drop_index('ix_attendance_date_id', table_name='attendance')
+    with op.batch_alter_table('attendance') as batch_op:
+        batch_op.drop_constraint('uq_attendance_student_date', type_='unique')
@@ -0,0 +1,83 @@
+"""Course schedules and materialised punctuality tables
+
+Revision ID: 5d8a3c1e7b42
+Revises: e9b3f6c2d418
+Create Date: 2026-10-17 14:00:00.000000
+
+Set the session windows with `flask set-course-schedule`, then run
+`flask classify-attendance --start <first day>` to populate the tables.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8a3c1e7b42'
+down_revision = 'e9b3f6c2d418'
+branch_labels = None
+depends_on = None
+
+
+def punctuality_columns():
+    return [
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('records', sa.Integer(), nullable=False),
+        sa.Column('late', sa.Integer(), nullable=False),
+        sa.Column('early_leave', sa.Integer(), nullable=False),
+        sa.Column('checked_out', sa.Integer(), nullable=False),
+        sa.Column('minutes_late', sa.Integer(), nullable=False),
+        sa.Column('minutes_early', sa.Integer(), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'course_schedule',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('course', sa.String(length=100), nullable=False),
+        sa.Column('weekday', sa.SmallInteger(), nullable=True),
+        sa.Column('starts_at', sa.Time(), nullable=False),
+        sa.Column('ends_at', sa.Time(), nullable=False),
+        sa.Column('grace_minutes', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('course', 'weekday', name='uq_course_schedule_course_weekday')
+    )
+    # No foreign key to attendance: a partitioned table has no unique id alone
+    op.create_table(
+        'attendance_punctuality',
+        sa.Column('attendance_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('course', sa.String(length=100), nullable=False),
+        sa.Column('late', sa.Boolean(), nullable=False),
+        sa.Column('minutes_late', sa.Integer(), nullable=False),
+        sa.Column('early_leave', sa.Boolean(), nullable=True),
+        sa.Column('minutes_early', sa.Integer(), nullable=True),
+        sa.Column('duration_minutes', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('attendance_id')
+    )
+    op.create_index('ix_attendance_punctuality_date', 'attendance_punctuality', ['date'])
+    op.create_table(
+        'student_punctuality',
+        *punctuality_columns(),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('period_start', 'student_id')
+    )
+    op.create_table(
+        'course_punctuality',
+        *punctuality_columns(),
+        sa.Column('course', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('period_start', 'course')
+    )
+
+
+def downgrade():
+    op.drop_table('course_punctuality')
+    op.drop_table('student_punctuality')
+    op.drop_index('ix_attendance_punctuality_date', table_name='attendance_punctuality')
+    op.drop_table('attendance_punctuality')
+    op.drop_table('course_schedule')
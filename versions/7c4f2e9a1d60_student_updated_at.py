@@ -0,0 +1,26 @@
+"""Student updated_at for the export watermark
+
+Revision ID: 7c4f2e9a1d60
+Revises: 5d8a3c1e7b42
+Create Date: 2026-10-17 16:00:00.000000
+
+Existing rows start out NULL; they only need a value once they change.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4f2e9a1d60'
+down_revision = '5d8a3c1e7b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('student', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('student', 'updated_at')
@@ -0,0 +1,51 @@
+"""Attendance rollup tables
+
+Revision ID: 8b2d4e6f1a37
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 10:00:00.000000
+
+Run `flask backfill-rollups` after upgrading to populate them.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f1a37'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def rollup_columns():
+    return [
+        sa.Column('grain', sa.String(length=10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False),
+        sa.Column('late', sa.Integer(), nullable=False),
+        sa.Column('absent', sa.Integer(), nullable=False),
+        sa.Column('first_time_in', sa.Time(), nullable=True),
+        sa.Column('last_time_out', sa.Time(), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'student_attendance_rollup',
+        *rollup_columns(),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('grain', 'period_start', 'student_id')
+    )
+    op.create_table(
+        'course_attendance_rollup',
+        *rollup_columns(),
+        sa.Column('course', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('grain', 'period_start', 'course')
+    )
+
+
+def downgrade():
+    op.drop_table('course_attendance_rollup')
+    op.drop_table('student_attendance_rollup')
@@ -0,0 +1,35 @@
+"""Student registration_date NOT NULL for keyset pagination
+
+Revision ID: a6d2f8c4e913
+Revises: 7c4f2e9a1d60
+Create Date: 2026-10-18 09:00:00.000000
+
+admin_students pages on (registration_date, id); a NULL date drops out of
+that comparison and cannot be put in a cursor. Rows without one get their
+confirmation date, failing that the time they were last changed or now.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2f8c4e913'
+down_revision = '7c4f2e9a1d60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "UPDATE student SET registration_date = "
+        "COALESCE(confirmation_date, updated_at, CURRENT_TIMESTAMP) "
+        "WHERE registration_date IS NULL"
+    )
+    with op.batch_alter_table('student') as batch_op:
+        batch_op.alter_column('registration_date', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('student') as batch_op:
+        batch_op.alter_column('registration_date', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,44 @@
+"""Give partitioned attendance a DEFAULT partition
+
+Revision ID: b8e2d5f1c7a3
+Revises: d1f7b3a9c5e2
+Create Date: 2026-10-18 14:00:00.000000
+
+PostgreSQL only. Without it, a check-in or backfill dated in a month that
+has no partition fails, and with it the whole batch it was written in.
+Such rows now land in attendance_default; flask create-partitions --start
+moves them into their own month's partition.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from partitions import DEFAULT_PARTITION, create_default_partition
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2d5f1c7a3'
+down_revision = 'd1f7b3a9c5e2'
+branch_labels = None
+depends_on = None
+
+
+def partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass('attendance')")).scalar() == 'p'
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql' and partitioned(bind):
+        create_default_partition(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not partitioned(bind):
+        return
+    if bind.execute(sa.text(f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}")).scalar():
+        raise RuntimeError(f"{DEFAULT_PARTITION} has rows; run flask create-partitions --start "
+                           "with their first month before downgrading")
+    op.execute(f"DROP TABLE {DEFAULT_PARTITION}")
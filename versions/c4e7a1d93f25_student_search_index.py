@@ -0,0 +1,45 @@
+"""Full-text search index on student
+
+Revision ID: c4e7a1d93f25
+Revises: 8b2d4e6f1a37
+Create Date: 2026-10-17 11:00:00.000000
+
+PostgreSQL only; the expression must stay identical to
+student_search_document() in app.py or searches will not use the index.
+It replaces the trigram indexes of 3f1c2a9d7b10, which no query uses any
+more and which every student write had to maintain.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a1d93f25'
+down_revision = '8b2d4e6f1a37'
+branch_labels = None
+depends_on = None
+
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, name || ' ' || student_id || ' ' "
+    "|| translate(email, '@.', '  ') || ' ' || course)"
+)
+
+TRGM_COLUMNS = ('name', 'email', 'student_id', 'course')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"CREATE INDEX ix_student_search ON student USING gin ({SEARCH_DOCUMENT})")
+        for column in TRGM_COLUMNS:
+            op.drop_index(f'ix_student_{column}_trgm', table_name='student')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_student_{column}_trgm', 'student', [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'}
+            )
+        op.drop_index('ix_student_search', table_name='student')
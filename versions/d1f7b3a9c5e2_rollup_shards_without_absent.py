@@ -0,0 +1,59 @@
+"""Shard the course rollups and stop storing absences
+
+Revision ID: d1f7b3a9c5e2
+Revises: a6d2f8c4e913
+Create Date: 2026-10-18 10:00:00.000000
+
+Check-ins spread their course counts over ROLLUP_SHARDS rows per course and
+period, keyed by student. Existing rows become shard 0, which the reports
+sum with the rest; run flask backfill-rollups afterwards so that
+check-rollups finds every student in their own shard. The absent columns
+were never written and are now derived from the roster.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f7b3a9c5e2'
+down_revision = 'a6d2f8c4e913'
+branch_labels = None
+depends_on = None
+
+
+def replace_primary_key(batch_op):
+    # SQLite's batch mode rebuilds the table around the new key instead
+    if op.get_bind().dialect.name != 'sqlite':
+        batch_op.drop_constraint('course_attendance_rollup_pkey', type_='primary')
+
+
+def upgrade():
+    with op.batch_alter_table('course_attendance_rollup') as batch_op:
+        batch_op.add_column(sa.Column('shard', sa.SmallInteger(), nullable=False, server_default='0'))
+        replace_primary_key(batch_op)
+        batch_op.create_primary_key('course_attendance_rollup_pkey',
+                                    ['grain', 'period_start', 'course', 'shard'])
+        batch_op.drop_column('absent')
+    with op.batch_alter_table('student_attendance_rollup') as batch_op:
+        batch_op.drop_column('absent')
+
+
+def downgrade():
+    # Fold each course's shards into one row per period, then drop the shard
+    op.execute(
+        "INSERT INTO course_attendance_rollup (course, shard, grain, period_start,"
+        " present, late, first_time_in, last_time_out)"
+        " SELECT course, -1, grain, period_start, SUM(present), SUM(late),"
+        " MIN(first_time_in), MAX(last_time_out)"
+        " FROM course_attendance_rollup GROUP BY course, grain, period_start"
+    )
+    op.execute("DELETE FROM course_attendance_rollup WHERE shard <> -1")
+    with op.batch_alter_table('course_attendance_rollup') as batch_op:
+        replace_primary_key(batch_op)
+        batch_op.create_primary_key('course_attendance_rollup_pkey',
+                                    ['grain', 'period_start', 'course'])
+        batch_op.drop_column('shard')
+        batch_op.add_column(sa.Column('absent', sa.Integer(), nullable=False, server_default='0'))
+    with op.batch_alter_table('student_attendance_rollup') as batch_op:
+        batch_op.add_column(sa.Column('absent', sa.Integer(), nullable=False, server_default='0'))
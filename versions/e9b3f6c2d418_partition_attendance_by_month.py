@@ -0,0 +1,88 @@
+"""Partition attendance by month
+
+Revision ID: e9b3f6c2d418
+Revises: c4e7a1d93f25
+Create Date: 2026-10-17 12:00:00.000000
+
+PostgreSQL only. The table is rebuilt as PARTITION BY RANGE (date) with one
+partition per month from the oldest row to PARTITION_MONTHS_AHEAD months
+from now, and the rows are copied across. The primary key becomes
+(id, date), since a partitioned table's unique constraints must include
+the partition key. This rewrites the whole table: run it in a maintenance
+window.
+
+"""
+import os
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from partitions import add_months, create_partitions
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b3f6c2d418'
+down_revision = 'c4e7a1d93f25'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, date, time, time_in, time_out, status, student_id"
+
+
+def rename_old_table(new_name):
+    op.execute(f"ALTER TABLE attendance RENAME TO {new_name}")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT attendance_pkey TO {new_name}_pkey")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT uq_attendance_student_date "
+               f"TO uq_{new_name}_student_date")
+    op.execute(f"ALTER INDEX ix_attendance_date_id RENAME TO ix_{new_name}_date_id")
+
+
+def create_table(partitioned):
+    primary_key = "PRIMARY KEY (id, date)" if partitioned else "PRIMARY KEY (id)"
+    op.execute(
+        "CREATE TABLE attendance ("
+        " id INTEGER NOT NULL DEFAULT nextval('attendance_id_seq'),"
+        f" date DATE{' NOT NULL' if partitioned else ''},"
+        " time TIME WITHOUT TIME ZONE,"
+        " time_in TIME WITHOUT TIME ZONE,"
+        " time_out TIME WITHOUT TIME ZONE,"
+        " status VARCHAR(20) NOT NULL,"
+        " student_id INTEGER NOT NULL REFERENCES student (id),"
+        f" {primary_key},"
+        " CONSTRAINT uq_attendance_student_date UNIQUE (student_id, date))"
+        + (" PARTITION BY RANGE (date)" if partitioned else "")
+    )
+    op.execute("CREATE INDEX ix_attendance_date_id ON attendance (date, id)")
+
+
+def move_rows(old_name):
+    op.execute(f"INSERT INTO attendance ({COLUMNS}) SELECT {COLUMNS} FROM {old_name}")
+    # The sequence belonged to the old id column and would go with its table
+    op.execute("ALTER SEQUENCE attendance_id_seq OWNED BY attendance.id")
+    op.execute(f"DROP TABLE {old_name}")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    if bind.execute(sa.text("SELECT COUNT(*) FROM attendance WHERE date IS NULL")).scalar():
+        raise RuntimeError("attendance has rows without a date; fix them before partitioning")
+
+    rename_old_table('attendance_unpartitioned')
+    create_table(partitioned=True)
+    first = bind.execute(sa.text("SELECT MIN(date) FROM attendance_unpartitioned")).scalar()
+    today = date.today()
+    create_partitions(bind, min(first or today, today),
+                      add_months(today, int(os.getenv('PARTITION_MONTHS_AHEAD', 3))))
+    move_rows('attendance_unpartitioned')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Renaming the parent leaves the partitions attached; they go with it
+    rename_old_table('attendance_partitioned')
+    create_table(partitioned=False)
+    move_rows('attendance_partitioned')
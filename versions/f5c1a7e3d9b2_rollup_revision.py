@@ -0,0 +1,32 @@
+"""Rollup revision for the export watermark
+
+Revision ID: f5c1a7e3d9b2
+Revises: b8e2d5f1c7a3
+Create Date: 2026-10-18 16:00:00.000000
+
+Existing rows start out at 1; only changes from here on need to show.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c1a7e3d9b2'
+down_revision = 'b8e2d5f1c7a3'
+branch_labels = None
+depends_on = None
+
+TABLES = ('student_attendance_rollup', 'course_attendance_rollup')
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column('revision', sa.Integer(), nullable=False,
+                                       server_default='1'))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('revision')